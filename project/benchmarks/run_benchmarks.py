@@ -0,0 +1,244 @@
+"""
+Offline benchmarks for the clean, translate, extract and load stages.
+
+Each stage runs the production code on a synthetic corpus (synthetic_jobs.py), with the stub LLM
+server, the stub translator and mongomock standing in for Ollama, Google Translate and MongoDB.
+Throughput (successful rows/s) and peak memory (RSS) are reported per stage and corpus size, and
+compared with a stored baseline; a drop beyond --tolerance, or a stage returning fewer rows than it
+was given, is reported as a regression (exit code 1).
+
+Run from the project directory (same working directory as the DAG tasks):
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/run_benchmarks.py                                  # 1k and 10k rows
+    python benchmarks/run_benchmarks.py --sizes 1000,10000,100000
+    python benchmarks/run_benchmarks.py --sizes 1000 --stages clean_data,load
+    python benchmarks/run_benchmarks.py --save-baseline                  # store the current numbers
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import importlib.util
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+
+# The stubs answer immediately, so the production rate limits and re-queue pauses would only add sleeps
+for _endpoint in ("GOOGLE_TRANSLATE", "OLLAMA"):
+    os.environ.setdefault(f"THROTTLE_{_endpoint}_RATE", "1000000")
+    os.environ.setdefault(f"THROTTLE_{_endpoint}_BURST", "1000")
+os.environ.setdefault("THROTTLE_REQUEUE_PAUSE", "0")
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "src", "data_gathering"))
+
+import mongomock
+import pymongo
+import pandas as pd
+from openai import OpenAI
+
+import trans
+from conc_clean import clean_data
+from description_trim import TOKEN_BUDGET, trim_description
+from load_jobs import prepare_records, sync_jobs
+from skill_taxonomy import SkillTaxonomy
+from throttle import process_with_requeue
+from stub_services import StubLLMServer, StubTranslator
+from synthetic_jobs import generate_jobs
+
+
+# ---------- CONFIG ---------- #
+DEFAULT_SIZES = "1000,10000"  # add 100000 for the full run (the translate stage takes hours)
+STAGES = ["clean_data", "detect_and_translate", "process_job_description", "load"]
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+# ---------------------------- #
+
+
+def load_extraction_module():
+    """job-description-skill-extract.py has dashes in its name, so it is loaded by path."""
+    spec = importlib.util.spec_from_file_location(
+        "job_description_skill_extract",
+        os.path.join(BENCHMARK_DIR, "..", "src", "data_gathering", "job-description-skill-extract.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_clean_data(df, args):
+    return len(clean_data(df.copy()))
+
+
+def bench_detect_and_translate(df, args):
+    # Set in the stage process: a spawned child does not see class attributes set in main()
+    StubTranslator.latency = args.translate_latency
+    trans.GoogleTranslator = StubTranslator
+    trans.translation_cache.clear()
+    descriptions = df["Job Description"].to_dict()
+    results, failures = process_with_requeue(
+        descriptions, trans.detect_and_translate, workers=trans.translator_endpoint.max_concurrency)
+    return len(results)
+
+
+def bench_process_job_description(df, args):
+    skill_extract = load_extraction_module()
+    llm_inputs = {index: trim_description(text, TOKEN_BUDGET)[0] for index, text in df["Job Description"].items()}
+    with StubLLMServer(latency=args.llm_latency) as server:
+        skill_extract.client = OpenAI(base_url=server.base_url, api_key="benchmark")
+        # process_job_description prints every raw answer
+        with redirect_stdout(io.StringIO()):
+            results, failures = process_with_requeue(
+                llm_inputs, skill_extract.process_job_description,
+                workers=skill_extract.llm_endpoint.max_concurrency)
+    return len(results)
+
+
+def bench_load(df, args):
+    """First load (insert + aggregate rebuild) followed by an incremental load of the next day."""
+    client = mongomock.MongoClient() if args.mongo_url is None else pymongo.MongoClient(args.mongo_url)
+    db = client["jobsBenchmark"]
+    for name in db.list_collection_names():
+        db.drop_collection(name)
+    collection = db.jobsCollectionTest
+    collection.create_index("job_key", unique=True)
+    taxonomy = SkillTaxonomy.load()  # ids added here stay in memory, the taxonomy file is not saved
+
+    sync_jobs(db, collection, prepare_records(df, taxonomy), taxonomy)
+    # Next day: 5% of the postings expired, 10% changed and 5% new
+    next_day = df.iloc[len(df) // 20:].copy()
+    changed = next_day.sample(frac=0.1, random_state=1).index
+    next_day.loc[changed, "Experience Level"] = "Senior"
+    new_rows = generate_jobs(max(1, len(df) // 20), seed=args.seed + 1, with_extracted=True)
+    sync_jobs(db, collection, prepare_records(pd.concat([next_day, new_rows], ignore_index=True), taxonomy), taxonomy)
+    rows = collection.count_documents({})
+    client.drop_database("jobsBenchmark")
+    return rows
+
+
+BENCHMARKS = {
+    "clean_data": bench_clean_data,
+    "detect_and_translate": bench_detect_and_translate,
+    "process_job_description": bench_process_job_description,
+    "load": bench_load,
+}
+
+
+def _run_stage(stage, size, args):
+    """Child process: builds the corpus, then times the stage and the peak RSS it adds."""
+    df = generate_jobs(size, seed=args.seed, with_extracted=True)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    rows_out = BENCHMARKS[stage](df, args)
+    seconds = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    return {"rows": size, "rows_out": rows_out, "seconds": round(seconds, 3),
+            "rows_per_second": round(rows_out / seconds, 1),
+            "peak_rss_mib": round(rss_after / 1024, 1), "stage_rss_mib": round((rss_after - rss_before) / 1024, 1)}
+
+
+def measure(stage, size, args):
+    """
+    Runs one benchmark in a fresh process, so every stage starts with cold caches and its own
+    peak RSS (no tracing overhead, unlike tracemalloc).
+    """
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_run_stage, stage, size, args).result()
+
+
+def incomplete(results):
+    """Stages that returned fewer rows than they were given (failed or dropped rows)."""
+    return [f"{stage} ({size} rows): only {result['rows_out']} rows succeeded"
+            for stage, sizes in results.items() for size, result in sizes.items()
+            if result["rows_out"] < result["rows"]]
+
+
+def compare(results, baseline, tolerance):
+    """Prints the change against the baseline and returns the list of regressions."""
+    regressions = []
+    for stage, sizes in results.items():
+        for size, result in sizes.items():
+            reference = baseline.get("results", {}).get(stage, {}).get(size)
+            if not reference:
+                print(f"{stage:<26}{size:>8}  no baseline")
+                continue
+            speed = result["rows_per_second"] / reference["rows_per_second"] - 1
+            line = f"{stage:<26}{size:>8}  throughput {speed:+.1%}"
+            if reference.get("peak_rss_mib"):
+                memory = result["peak_rss_mib"] / reference["peak_rss_mib"] - 1
+                line += f", peak memory {memory:+.1%}"
+                if memory > tolerance:
+                    regressions.append(f"{stage} ({size} rows): peak memory {memory:+.1%}")
+            if speed < -tolerance:
+                regressions.append(f"{stage} ({size} rows): throughput {speed:+.1%}")
+            print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the pipeline stages.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated corpus sizes")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Stub LLM latency per call (s)")
+    parser.add_argument("--translate-latency", type=float, default=0.01, help="Stub translator latency per call (s)")
+    parser.add_argument("--mongo-url", default=None, help="Local mongod instead of mongomock")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    results = {stage: {} for stage in stages}
+    print(f"{'stage':<26}{'rows':>8}{'rows out':>10}{'seconds':>10}{'rows/s':>11}{'peak RSS MiB':>14}{'stage MiB':>11}")
+    for size in [int(size) for size in args.sizes.split(",")]:
+        for stage in stages:
+            result = measure(stage, size, args)
+            results[stage][str(size)] = result
+            print(f"{stage:<26}{size:>8}{result['rows_out']:>10}{result['seconds']:>10}{result['rows_per_second']:>11}"
+                  f"{result['peak_rss_mib']:>14}{result['stage_rss_mib']:>11}")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "settings": {"llm_latency": args.llm_latency, "translate_latency": args.translate_latency,
+                     "mongo": "mongod" if args.mongo_url else "mongomock"},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    regressions = incomplete(results)
+    if args.save_baseline:
+        if regressions:
+            print("\nNot saving the baseline, some rows failed:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline saved to: {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        print(f"\nCompared with the baseline from {baseline.get('created')} (tolerance {args.tolerance:.0%}):")
+        regressions += compare(results, baseline, args.tolerance)
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+    if regressions:
+        print("\nRegressions:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
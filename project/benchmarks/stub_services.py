@@ -0,0 +1,99 @@
+"""
+Local stand-ins for the external services, so the benchmarks run offline and deterministically.
+
+  - StubLLMServer: OpenAI-compatible /v1/chat/completions endpoint (what Ollama exposes) answering in the
+    format parse_raw_content expects after a configurable latency.
+  - StubTranslator: drop-in for deep_translator.GoogleTranslator with a configurable latency.
+
+MongoDB is replaced by mongomock in run_benchmarks.py (or a local mongod through --mongo-url).
+"""
+
+import re
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+KNOWN_SKILLS = ["Python", "SQL", "Spark", "AWS", "Azure", "Docker", "Kubernetes", "TensorFlow", "PyTorch",
+                "scikit-learn", "Airflow", "Tableau", "Power BI", "Git", "Linux", "Pandas", "NLP"]
+SKILL_PATTERN = re.compile(r"\b(" + "|".join(re.escape(skill) for skill in KNOWN_SKILLS) + r")\b")
+
+
+def fake_completion(description):
+    """Answer shaped like llama3.2's, built from the skills mentioned in the description."""
+    skills = list(dict.fromkeys(SKILL_PATTERN.findall(description)))
+    years = [int(value) for value in re.findall(r"(\d+)\+? (?:years|ans)", description)]
+    level = "Not specified" if not years else "Junior" if max(years) < 3 else "Mid-level" if max(years) <= 8 else "Senior"
+    return (f"Must-have skills: {', '.join(skills[:5]) or 'Not specified'}\n"
+            f"Nice-to-have skills: {', '.join(skills[5:]) or 'Communication'}\n"
+            f"Experience Level: {level}\n"
+            f"Type of Contract: Full-Time\n"
+            f"Education level: Bachelor's degree")
+
+
+class StubLLMServer:
+    """Threaded HTTP server answering chat completions after `latency` seconds."""
+
+    def __init__(self, latency=0.05, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                prompt = body.get("messages", [{}])[-1].get("content", "")
+                time.sleep(server.latency)
+                server.requests += 1
+                payload = json.dumps({
+                    "id": f"chatcmpl-{server.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": fake_completion(prompt)}}],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 40,
+                              "total_tokens": len(prompt) // 4 + 40},
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # one line per request would drown the benchmark output
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="stub-llm", daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StubTranslator:
+    """Same interface as GoogleTranslator(source, target).translate(text)."""
+
+    latency = 0.01
+    calls = 0
+
+    def __init__(self, source="auto", target="en"):
+        self.source = source
+        self.target = target
+
+    def translate(self, text):
+        time.sleep(StubTranslator.latency)
+        StubTranslator.calls += 1
+        return f"[{self.source}->{self.target}] {text}"
@@ -0,0 +1,168 @@
+"""
+Synthetic job postings shaped like the scraped CSVs (Jobs-Data_Scraped.csv / JobSpy_scraped_jobs.csv).
+
+Descriptions mix English and French the way Quebec postings do: English only, French only, or a
+bilingual posting repeating the same content in both languages, plus the usual company, benefits and
+EEO sections. Extracted-skill columns can be added to feed the loader benchmark.
+
+    python benchmarks/synthetic_jobs.py --rows 10000 --output benchmarks/data/jobs_10k.csv
+"""
+
+import os
+import random
+import argparse
+
+import pandas as pd
+
+
+TITLES = ["Data Scientist", "Machine Learning Engineer", "Data Engineer", "Data Analyst", "MLOps Engineer",
+          "Business Intelligence Developer", "AI Researcher", "Analytics Engineer", "Software Engineer, ML"]
+SENIORITY = ["", "Junior ", "Senior ", "Lead ", "Principal "]
+COMPANIES = ["Northwind Analytics", "Maple Data Labs", "Boréal IA", "Laurentian Systems", "Prairie Cloud",
+             "Coastal Robotics", "Groupe Fleuve", "Aurora Insights", "Summit Health Data", "Voyageur Tech"]
+PROVINCES = {
+    "Quebec": ["Montréal, QC", "Québec, QC", "Laval, QC", "Gatineau, QC"],
+    "Ontario": ["Toronto, ON", "Ottawa, ON", "Waterloo, ON"],
+    "Alberta": ["Calgary, AB", "Edmonton, AB"],
+    "British Columbia": ["Vancouver, BC", "Victoria, BC"],
+}
+KEYWORDS = ["Machine Learning", "Data Science", "Data Engineer", "Artificial Intelligence"]
+SKILLS = ["Python", "SQL", "Spark", "AWS", "Azure", "Docker", "Kubernetes", "TensorFlow", "PyTorch",
+          "scikit-learn", "Airflow", "Tableau", "Power BI", "Git", "Linux", "Pandas", "NLP", "Computer Vision"]
+SOFT_SKILLS = ["Communication", "Teamwork", "Problem solving", "Leadership", "Bilingualism"]
+LEVELS = ["Junior", "Mid-level", "Senior", "Not specified"]
+CONTRACTS = ["Full-Time", "Contract", "Part-Time", "Internship"]
+EDUCATION = ["Bachelor's degree", "Master's degree", "PhD", "Not specified"]
+QUEBEC_LANGUAGE_RATIOS = (0.45, 0.35)  # (French only, bilingual): Quebec postings are mostly French
+
+EN_INTRO = [
+    "{company} is looking for a {title} to join our growing team in {city}.",
+    "As a {title} at {company}, you will turn data into products used by thousands of customers.",
+    "Join {company} as a {title} and help us build the next generation of our platform.",
+]
+EN_DUTIES = [
+    "Design, train and deploy machine learning models with {s1} and {s2}.",
+    "Build reliable data pipelines in {s1} and orchestrate them with {s2}.",
+    "Work with product teams to define metrics and build dashboards in {s1}.",
+    "Maintain our {s1} infrastructure and automate deployments with {s2}.",
+    "Analyze large datasets using {s1} and communicate insights to stakeholders.",
+    "Monitor models in production and improve their performance over time.",
+]
+EN_REQUIREMENTS = [
+    "{years}+ years of experience with {s1}.",
+    "Strong knowledge of {s1}, {s2} and {s3}.",
+    "Experience with {s1} is an asset.",
+    "A degree in computer science, statistics or a related field.",
+    "Excellent communication skills in English and French.",
+]
+FR_INTRO = [
+    "{company} est à la recherche d'un(e) {title} pour joindre notre équipe à {city}.",
+    "En tant que {title} chez {company}, vous transformerez les données en produits utilisés par nos clients.",
+]
+FR_DUTIES = [
+    "Concevoir, entraîner et déployer des modèles d'apprentissage automatique avec {s1} et {s2}.",
+    "Développer des pipelines de données fiables en {s1} et les orchestrer avec {s2}.",
+    "Analyser de grands volumes de données avec {s1} et présenter les résultats aux parties prenantes.",
+    "Surveiller les modèles en production et améliorer leur performance.",
+]
+FR_REQUIREMENTS = [
+    "{years} ans et plus d'expérience avec {s1}.",
+    "Très bonne connaissance de {s1}, {s2} et {s3}.",
+    "La connaissance de {s1} est un atout.",
+    "Un diplôme en informatique, en statistique ou dans un domaine connexe.",
+]
+BOILERPLATE = [
+    "About {company}\n{company} was founded in 2004 and serves clients across North America. "
+    "Our mission is to make data useful for everyone.",
+    "What we offer\nCompetitive salary. Dental insurance and vision care. Paid time off. RRSP matching. "
+    "Wellness allowance.",
+    "{company} is an equal opportunity employer. All qualified applicants will receive consideration "
+    "without regard to race, colour, religion, sex, sexual orientation or gender identity. "
+    "Accommodations are available on request.",
+    "We thank all applicants for their interest; only candidates selected for an interview will be contacted.",
+    "Avantages\nAssurances collectives, régime de retraite et horaire flexible. "
+    "Seuls les candidats retenus seront contactés.",
+]
+
+
+def _fill(template, rng, context):
+    skills = rng.sample(SKILLS, 3)
+    return template.format(s1=skills[0], s2=skills[1], s3=skills[2], years=rng.randint(1, 10), **context)
+
+
+def _section(rng, context, intro, duties, requirements, headings):
+    lines = [_fill(rng.choice(intro), rng, context), "", headings[0]]
+    lines += [_fill(template, rng, context) for template in rng.sample(duties, rng.randint(2, len(duties)))]
+    lines += ["", headings[1]]
+    lines += [_fill(template, rng, context) for template in rng.sample(requirements, rng.randint(2, len(requirements)))]
+    return "\n".join(lines)
+
+
+def make_description(rng, context, french_ratio, bilingual_ratio):
+    """One posting: English, French or both, with 1-4 boilerplate sections."""
+    english = _section(rng, context, EN_INTRO, EN_DUTIES, EN_REQUIREMENTS, ("Responsibilities", "Requirements"))
+    french = _section(rng, context, FR_INTRO, FR_DUTIES, FR_REQUIREMENTS, ("Responsabilités", "Exigences"))
+    draw = rng.random()
+    if draw < bilingual_ratio:
+        body = english + "\n\n" + french
+    elif draw < bilingual_ratio + french_ratio:
+        body = french
+    else:
+        body = english
+    extras = [template.format(**context) for template in rng.sample(BOILERPLATE, rng.randint(1, 4))]
+    return "\n\n".join([body] + extras)
+
+
+def generate_jobs(rows, seed=42, french_ratio=0.1, bilingual_ratio=0.05, with_extracted=False):
+    """
+    Returns a DataFrame with the scraped columns (and the LLM output columns if with_extracted).
+    french_ratio / bilingual_ratio apply outside Quebec; Quebec postings use QUEBEC_LANGUAGE_RATIOS.
+    """
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        province = rng.choice(list(PROVINCES))
+        city = rng.choice(PROVINCES[province])
+        title = rng.choice(SENIORITY) + rng.choice(TITLES)
+        company = rng.choice(COMPANIES)
+        ratios = QUEBEC_LANGUAGE_RATIOS if province == "Quebec" else (french_ratio, bilingual_ratio)
+        context = {"company": company, "title": title, "city": city.split(",")[0]}
+        record = {
+            "Job Title": title,
+            "Company Name": company,
+            "Location": city,
+            "Salary": rng.choice(["", f"${rng.randint(60, 160)}K (Employer Est.)", f"${rng.randint(35, 80)}/hr"]),
+            "Posted Day": rng.choice([f"{rng.randint(1, 29)}d", "30d+", "24h"]),
+            "Job Description": make_description(rng, context, *ratios),
+            "job url": f"https://example.com/jobs/{seed}-{i}",
+            "Provincia": province,
+            "Keyword": rng.choice(KEYWORDS),
+        }
+        if with_extracted:
+            record.update({
+                "Must-have Skills": ", ".join(rng.sample(SKILLS, rng.randint(2, 6))),
+                "Nice-to-have Skills": ", ".join(rng.sample(SOFT_SKILLS + SKILLS, rng.randint(1, 4))),
+                "Experience Level": rng.choice(LEVELS),
+                "Type of Contract": rng.choice(CONTRACTS),
+                "Education level": rng.choice(EDUCATION),
+            })
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic job postings.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--with-extracted", action="store_true", help="Add the LLM output columns")
+    parser.add_argument("--output", default="benchmarks/data/synthetic_jobs.csv")
+    args = parser.parse_args()
+
+    df = generate_jobs(args.rows, seed=args.seed, with_extracted=args.with_extracted)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    df.to_csv(args.output, index=False, encoding="utf-8-sig")
+    print(f"{len(df)} synthetic postings saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
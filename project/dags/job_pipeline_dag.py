@@ -1,11 +1,46 @@
 from airflow import DAG
 from airflow.operators.python_operator import PythonOperator
 from datetime import datetime
+import os
+import sys
+import json
+import tempfile
 import subprocess
 
+# Shared instrumentation module lives next to the pipeline scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'data_gathering'))
+import metrics
+import profiling
+
 # Function to run external Python scripts
-def run_script(script_path):
-    subprocess.run(["python", script_path], check=True)
+# The script's metrics summary is returned, so Airflow pushes it to XCom (key 'return_value')
+# Trigger a run with {"profile": "cprofile"}, {"profile": "sample"} or {"profile": "memory"} (or set
+# PIPELINE_PROFILE) to run each script under src/data_gathering/profiling.py; artifacts go to
+# profiles/<run_id>/<task>/
+def run_script(script_path, *args, **context):
+    task_name = os.path.splitext(os.path.basename(script_path))[0]
+    profile = str((context.get('params') or {}).get('profile') or os.getenv('PIPELINE_PROFILE', 'off')).strip().lower()
+    if profile not in profiling.MODES and profile not in profiling.OFF_VALUES:
+        # A typo in the trigger conf should not fail the pipeline itself
+        print(f"Unknown profile mode '{profile}' (expected one of {', '.join(profiling.MODES)} or off), "
+              f"running {task_name} without profiling.")
+        profile = 'off'
+    command = ["python", script_path, *args]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        metrics_file = os.path.join(tmp_dir, 'metrics.json')
+        env = dict(os.environ, METRICS_XCOM_FILE=metrics_file)
+        if profile in profiling.MODES:
+            env.update(PIPELINE_PROFILE=profile, PIPELINE_PROFILE_RUN_ID=context.get('run_id') or '')
+            command = ["python", "src/data_gathering/profiling.py", script_path, *args]
+        with metrics.stage(task_name):
+            subprocess.run(command, check=True, env=env)
+        summary = {}
+        if os.path.exists(metrics_file):
+            with open(metrics_file) as file:
+                summary = json.load(file)
+    # Wall time of the whole task, subprocess start-up included
+    summary['task'] = metrics.export(f"dag_{task_name}")['stages'][task_name]
+    return summary
 
 # Define the DAG
 default_args = {
@@ -14,12 +49,16 @@ default_args = {
     'retries': 1,
 }
 
+# Profiling is off unless a run is triggered with another value (see run_script)
+params = {'profile': os.getenv('PIPELINE_PROFILE', 'off')}
+
 dag = DAG(
     'job_data_pipeline',
     default_args=default_args,
     description='A DAG to orchestrate job scraping, cleaning, enrichment and storage',
     schedule_interval='@daily',  # Can be changed to manual or hourly
-    catchup=False
+    catchup=False,
+    params=params
 )
 
 # Define tasks
@@ -66,5 +105,32 @@ load_to_mongo = PythonOperator(
     dag=dag
 )
 
+build_similarity_index = PythonOperator(
+    task_id='build_similarity_index',
+    python_callable=run_script,
+    op_args=['src/data_gathering/similarity_index.py', 'build'],
+    dag=dag
+)
+
 # Set dependencies
 [scrape_glassdoor, scrape_jobspy] >> clean_data >> translate_jobs >> extract_skills >> load_to_mongo
+extract_skills >> build_similarity_index
+
+
+# Optional streaming mode: one long-running task where postings flow through bounded queues
+# (scrape -> clean -> translate -> extract -> load) instead of waiting for each stage to finish
+streaming_dag = DAG(
+    'job_data_pipeline_streaming',
+    default_args=default_args,
+    description='Streaming variant of job_data_pipeline: stages run concurrently on each posting',
+    schedule_interval=None,  # Trigger manually instead of (or alternating with) the batch DAG
+    catchup=False,
+    params=params
+)
+
+stream_pipeline = PythonOperator(
+    task_id='stream_pipeline',
+    python_callable=run_script,
+    op_args=['src/data_gathering/streaming_pipeline.py'],
+    dag=streaming_dag
+)
@@ -30,11 +30,28 @@ import pandas as pd
 import os
 import time
 import random
+import argparse
+from urllib.parse import urljoin
+
+import metrics
+from throttle import get_endpoint
+from glassdoor_archive import CaptureWriter, read_archive
 
 
 load_dotenv()
 GLASSDOOR_EMAIL = os.getenv('GLASSDOOR_EMAIL')
 GLASSDOOR_PASSWORD = os.getenv('GLASSDOOR_PASSWORD')
+BASE_URL = 'https://www.glassdoor.ca'
+
+# Outer HTML of the job detail pane (falls back to the description block's parent)
+DETAIL_PANE_SCRIPT = """
+    var pane = document.querySelector("[class*='JobDetails_jobDetailsContainer']");
+    if (!pane) {
+        var description = document.querySelector("div[class*='JobDetails_jobDescription']");
+        pane = description ? description.parentElement : null;
+    }
+    return pane ? pane.outerHTML : null;
+"""
 
 def load_list_from_file(file_path):
     items = []
@@ -187,10 +204,99 @@ def search_jobs(driver, job_title, location):
 
     except Exception as e:
         print(f"Error during job search: {e}")
+        raise  # let the throttling endpoint retry the search
+
+
+def _element_text(card, class_name):
+    element = card.find(class_=class_name)
+    if element is None:
+        raise ValueError(f"Job card has no '{class_name}' element")
+    return " ".join(element.get_text(" ").split())
+
+
+def parse_job_card(card_html):
+    """Extracts the fields visible on a job card from its HTML."""
+    card = BeautifulSoup(card_html, 'html.parser')
+    job_title = _element_text(card, 'JobCard_jobTitle__GLyJ1')
+    href = card.find(class_='JobCard_jobTitle__GLyJ1').get('href')
 
+    # handle aditional information
+    try:
+        salary = _element_text(card, 'JobCard_salaryEstimate__QpbTW')
+    except ValueError:
+        salary = "N/A"
+    try:
+        posted_day = _element_text(card, 'JobCard_listingAge__jJsuc')
+    except ValueError:
+        posted_day = "N/A"
+
+    return {
+        'Job Title': job_title,
+        'Company Name': _element_text(card, 'EmployerProfile_compactEmployerName__9MGcV'),
+        'Location': _element_text(card, 'JobCard_location__Ds1fM'),
+        'Salary': salary,
+        'Posted Day': posted_day,
+        'job url': urljoin(BASE_URL, href) if href else "N/A",
+    }
+
+
+def parse_job_description(detail_html):
+    """Extracts the job description from the detail pane (or full page) HTML."""
+    soup = BeautifulSoup(detail_html or "", 'html.parser')
+    description = soup.find('div', class_='JobDetails_jobDescription__uW_fK')
+    return description.text.strip() if description is not None else "N/A"
+
+
+def build_job(card_html, detail_html, keyword, providence):
+    """Same record live and in replay mode: card fields, description, search keyword and province."""
+    job = parse_job_card(card_html)
+    return {
+        'Job Title': job['Job Title'],
+        'Company Name': job['Company Name'],
+        'Location': job['Location'],
+        'Salary': job['Salary'],
+        'Posted Day': job['Posted Day'],
+        'Job Description': parse_job_description(detail_html),
+        'job url': job['job url'],
+        'Provincia': providence,
+        'Keyword': keyword,
+    }
+
+
+def save_search_results(jobs_data, keyword, providence):
+    df = pd.DataFrame(jobs_data)
+    df = df.drop_duplicates()
+    df.to_csv(f"src/data_gathering/glassdoor_jobs_{keyword}{providence}.csv", index=False, encoding='utf-8-sig')
+    print(f'Scraping complete. Data saved to f"glassdoor_jobs_{keyword}{providence}.csv".')
 
-def scrape_job_listings(driver, keyword, providence):
-    """Scrapes job listings from the search results."""
+
+def concatenate_search_results(keys, providence):
+    """Combines the per-search CSVs into Jobs-Data_Scraped.csv and returns the combined data."""
+    data_final = pd.DataFrame()
+    for documento in keys:
+        for i in providence:
+            file_path = f"src/data_gathering/glassdoor_jobs_{documento}{i}.csv"
+            if not os.path.exists(file_path):
+                continue  # search skipped after repeated failures
+            data1 = pd.read_csv(file_path)
+            data_final = pd.concat([data_final, data1], ignore_index=True)
+    return save_combined_results(data_final)
+
+
+def save_combined_results(data_final):
+    """Drops duplicate rows and writes Jobs-Data_Scraped.csv."""
+    print(data_final.shape)
+
+    data_final = data_final[~data_final.duplicated(keep='first')]
+    data_final.to_csv("src/data_gathering/Jobs-Data_Scraped.csv", index=False, encoding='utf-8-sig')
+    return data_final
+
+
+def scrape_job_listings(driver, keyword, providence, on_job=None, capture=None):
+    """
+    Scrapes job listings from the search results. on_job, if given, receives each job as it is scraped;
+    capture, if given (a glassdoor_archive.CaptureWriter), stores the card and detail-pane HTML.
+    """
     jobs_data = []  #Container Job Offer
     processed_jobs = set() #Unique Job offer
 
@@ -198,9 +304,10 @@ def scrape_job_listings(driver, keyword, providence):
         new_jobs_found = False
         try:
             # Wait until every job card is loaded 
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_all_elements_located((By.CLASS_NAME, 'jobCard'))
-            )
+            with metrics.timed("webdriver", action="wait_job_cards"):
+                WebDriverWait(driver, 20).until(
+                    EC.presence_of_all_elements_located((By.CLASS_NAME, 'jobCard'))
+                )
             print("Job cards loaded successfully.")
             human_delay(2, 3)
 
@@ -218,47 +325,24 @@ def scrape_job_listings(driver, keyword, providence):
 
                     # Click on the card to load the descriptions 
                     dismiss_popup(driver)
-                    job_card.click()
+                    with metrics.timed("webdriver", action="card_click"):
+                        job_card.click()
                     dismiss_popup(driver)
                     human_delay(2, 3)
 
-                    # Exctract information visible on the card 
-                    job_title_element = job_card.find_element(By.CLASS_NAME, 'JobCard_jobTitle__GLyJ1')
-                    job_title = job_title_element.text.strip()
-                    company_name = job_card.find_element(By.CLASS_NAME, 'EmployerProfile_compactEmployerName__9MGcV').text.strip()
-                    location = job_card.find_element(By.CLASS_NAME, 'JobCard_location__Ds1fM').text.strip()
-                    job_url = job_title_element.get_attribute('href')
+                    # Raw HTML of the card and of the detail pane it opened
+                    card_html = job_card.get_attribute('outerHTML')
+                    with metrics.timed("webdriver", action="detail_pane"):
+                        detail_html = driver.execute_script(DETAIL_PANE_SCRIPT) or driver.page_source
+                    if capture is not None:
+                        capture.write(keyword, providence, card_html, detail_html)
 
-                    # handle aditional information
-                    try:
-                        salary = job_card.find_element(By.CLASS_NAME, 'JobCard_salaryEstimate__QpbTW').text.strip()
-                    except Exception:
-                        salary = "N/A"
-
-                    try:
-                        posted_day = job_card.find_element(By.CLASS_NAME, 'JobCard_listingAge__jJsuc').text.strip()
-                    except Exception:
-                        posted_day = "N/A"
-
-                    #exctractyhe job description 
-                    soup = BeautifulSoup(driver.page_source, 'html.parser')
-                    try:
-                        job_description = soup.find('div', class_='JobDetails_jobDescription__uW_fK').text.strip()
-                    except Exception:
-                        job_description = "N/A"
-
-                    #add all information in the directory 
-                    jobs_data.append({
-                        'Job Title': job_title,
-                        'Company Name': company_name,
-                        'Location': location,
-                        'Salary': salary,
-                        'Posted Day': posted_day,
-                        'Job Description': job_description,
-                        'job url': job_url if job_url else "N/A",
-                        'Provincia': providence,
-                        'Keyword': keyword,
-                    })
+                    # Exctract the card information and the job description
+                    with metrics.timed("parse", action="job_card"):
+                        job = build_job(card_html, detail_html, keyword, providence)
+                    jobs_data.append(job)
+                    if on_job is not None:
+                        on_job(job)
 
 
                 except Exception as job_error:
@@ -276,10 +360,11 @@ def scrape_job_listings(driver, keyword, providence):
                 print("No new job cards found. Exiting loop.")
                 break
             try:
-                show_more_button = WebDriverWait(driver, 20).until(
-                     EC.element_to_be_clickable((By.XPATH, '//button[@data-test="load-more"]'))
-                 )
-                show_more_button.click()
+                with metrics.timed("webdriver", action="show_more"):
+                    show_more_button = WebDriverWait(driver, 20).until(
+                         EC.element_to_be_clickable((By.XPATH, '//button[@data-test="load-more"]'))
+                     )
+                    show_more_button.click()
                 print("Clicked 'Show more jobs' button. Loading more jobs...")
                 human_delay(3, 4)
 
@@ -292,17 +377,12 @@ def scrape_job_listings(driver, keyword, providence):
             break
 
     # Saved Data Into a CSV file
-    df = pd.DataFrame(jobs_data)
-    df = df.drop_duplicates()
-    df.to_csv(f"src/data_gathering/glassdoor_jobs_{keyword}{providence}.csv", index=False, encoding='utf-8-sig')
-    print(f'Scraping complete. Data saved to f"glassdoor_jobs_{keyword}{providence}.csv".')
-
+    save_search_results(jobs_data, keyword, providence)
 
 
-if __name__ == "__main__":
-    start_time = time.time()
-    # Set up Selenium WebDriver
 
+def create_driver():
+    """Sets up the headless Chrome WebDriver used for scraping."""
     #options.headless = False  # Set to True for headless mode
     options = Options()
     options.add_argument("--headless=new")  # Modern headless mode
@@ -320,38 +400,71 @@ if __name__ == "__main__":
             Object.defineProperty(navigator, 'webdriver', {get: () => undefined})
         """
     })
-
-    keys = load_list_from_file("src/data_gathering/keywords.txt")
-    providence = load_list_from_file("src/data_gathering/providence.txt")
     # Maximize browser windows
     driver.maximize_window()
+    return driver
+
+
+def replay_archives(paths):
+    """Rebuilds the per-search CSVs and Jobs-Data_Scraped.csv from captured archives, without a browser."""
+    searches = {}
+    for path in paths:
+        for record in read_archive(path):
+            try:
+                with metrics.timed("parse", action="job_card"):
+                    job = build_job(record['card_html'], record['detail_html'], record['keyword'], record['providence'])
+            except Exception as job_error:
+                print(f"Error processing job card: {job_error}")
+                continue
+            searches.setdefault((record['keyword'], record['providence']), []).append(job)
+
+    for (keyword, providence), jobs_data in searches.items():
+        save_search_results(jobs_data, keyword, providence)
+    # Combined from the replayed jobs only: other per-search CSVs on disk may come from older runs
+    frames = [pd.DataFrame(jobs_data).drop_duplicates() for jobs_data in searches.values()]
+    return save_combined_results(pd.concat(frames, ignore_index=True) if frames else pd.DataFrame())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Glassdoor job listings.")
+    parser.add_argument("--replay", nargs="+", metavar="ARCHIVE",
+                        help="Parse captured .jsonl.zst archives instead of scraping the live site")
+    args = parser.parse_args()
+
+    if args.replay:
+        with metrics.stage("replay_glassdoor") as run:
+            run.rows_out = len(replay_archives(args.replay))
+        metrics.export("replay_glassdoor")
+        exit()
+
+    with metrics.stage("scrape_glassdoor") as run:
+        # Set up Selenium WebDriver
+        driver = create_driver()
+        capture = CaptureWriter.for_run()  # None unless GLASSDOOR_CAPTURE_DIR is set
+
+        keys = load_list_from_file("src/data_gathering/keywords.txt")
+        providence = load_list_from_file("src/data_gathering/providence.txt")
+
+        try:
+            login_to_glassdoor(driver, GLASSDOOR_EMAIL, GLASSDOOR_PASSWORD)
+            navigate_to_jobs(driver)
+            for i in keys:
+                for j in providence:
+                    try:
+                        get_endpoint("glassdoor").call(search_jobs, driver, i, j)
+                    except Exception as e:
+                        print(f"Skipping {i} in {j}: {e}")
+                        continue
+                    scrape_job_listings(driver, i, j, capture=capture)
+
+            #concating each csv file
+            data_final = concatenate_search_results(keys, providence)
+            run.rows_out = len(data_final)
 
-    try:
-        login_to_glassdoor(driver, GLASSDOOR_EMAIL, GLASSDOOR_PASSWORD)
-        navigate_to_jobs(driver)
-        for i in keys:
-            for j in providence:
-                search_jobs(driver, i, j)
-                scrape_job_listings(driver, i, j)
         
-        #concating each csv file
-        data_final = pd.DataFrame()
-        for documento in keys: 
-            for i in providence:
-                data1 = pd.read_csv(f"src/data_gathering/glassdoor_jobs_{documento}{i}.csv")
-                data_final = pd.concat([data_final, data1], ignore_index=True)
-
-        print(data_final.shape)
-
-        data_final = data_final[~data_final.duplicated(keep='first')]
-        data_final.shape
-
-        data_final.to_csv("src/data_gathering/Jobs-Data_Scraped.csv", index=False, encoding='utf-8-sig')
-
-    
-    finally:
-        time.sleep(5)
-        end_time = time.time()
-        elapsed_time = end_time - start_time
-        print(f"Total execution time: {elapsed_time:.2f} Seconds")
-        driver.quit()
+        finally:
+            if capture is not None:
+                capture.close()
+            time.sleep(5)
+            driver.quit()
+    metrics.export("scrape_glassdoor")
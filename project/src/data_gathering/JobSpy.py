@@ -2,7 +2,9 @@ import os
 import csv
 import pandas as pd
 from jobspy import scrape_jobs
-import time
+
+import metrics
+from throttle import get_endpoint, process_with_requeue
 
 
 
@@ -13,6 +15,15 @@ LOCATIONS_PATH = "src/data_gathering/providence.txt"
 OUTPUT_DIR = "src/data_gathering/jobspy_outputs"
 FINAL_OUTPUT = "src/data_gathering/JobSpy_scraped_jobs.csv"
 CRITERIA_COLUMNS = ["location", "title", "company", "job_type"]
+OUTPUT_COLUMNS = {
+    'title': 'Job Title',
+    'company': 'Company Name',
+    'location': 'Location',
+    'salary_source': 'Salary',
+    'date_posted': 'Posted Day',
+    'description': 'Job Description',
+    'job_url': 'job url',
+}
 # ---------------------------- #
 
 def load_list_from_file(file_path):
@@ -28,27 +39,44 @@ def load_list_from_file(file_path):
         print(f"⚠️ File not found: {file_path}")
     return items
 
+def scrape_keyword_location(keyword, location):
+    print(f"🔍 Scraping: {keyword} in {location}")
+    jobs = get_endpoint("jobspy").call(
+        scrape_jobs,
+        site_name=["zip_recruiter", "google"],
+        search_term=keyword,
+        google_search_term=f"{keyword} jobs near {location} since yesterday",
+        location=location,
+        results_wanted=20000,
+        hours_old=720,
+        country_indeed="Canada"
+    )
+    jobs["Provincia"] = location.split(",")[0]
+    jobs["Keyword"] = keyword
+    print(f"📝 Found {len(jobs)} jobs")
+    return jobs
+
+def select_output_columns(df):
+    """Keeps the columns shared with the Glassdoor output, renamed to the pipeline's names."""
+    selected = df[list(OUTPUT_COLUMNS) + ['Provincia', 'Keyword']]
+    return selected.rename(columns=OUTPUT_COLUMNS)
+
+def scrape_and_save(search):
+    keyword, location = search
+    jobs = scrape_keyword_location(keyword, location)
+
+    output_file = os.path.join(OUTPUT_DIR, f"{keyword}_{location}.csv")
+    jobs.to_csv(output_file, quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", index=False)
+    print(f"✅ Saved to {output_file}")
+
 def run_jobspy_scraper(keywords, locations):
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    for keyword in keywords:
-        for location in locations:
-            print(f"🔍 Scraping: {keyword} in {location}")
-            jobs = scrape_jobs(
-                site_name=["zip_recruiter", "google"],
-                search_term=keyword,
-                google_search_term=f"{keyword} jobs near {location} since yesterday",
-                location=location,
-                results_wanted=20000,
-                hours_old=720,
-                country_indeed="Canada"
-            )
-            jobs["Provincia"] = location.split(",")[0]
-            jobs["Keyword"] = keyword
-            print(f"📝 Found {len(jobs)} jobs")
-
-            output_file = os.path.join(OUTPUT_DIR, f"{keyword}_{location}.csv")
-            jobs.to_csv(output_file, quoting=csv.QUOTE_NONNUMERIC, escapechar="\\", index=False)
-            print(f"✅ Saved to {output_file}")
+    searches = {f"{keyword} in {location}": (keyword, location) for keyword in keywords for location in locations}
+    # Searches that fail (after retries) are re-queued for a later pass
+    endpoint = get_endpoint("jobspy")
+    _, failures = process_with_requeue(searches, scrape_and_save, workers=endpoint.max_concurrency, endpoint=endpoint)
+    if failures:
+        print(f"⚠️ {len(failures)} searches failed: {', '.join(failures)}")
 
 def load_and_clean_csv_files(folder_path):
     df_list = []
@@ -81,35 +109,24 @@ def load_and_clean_csv_files(folder_path):
     return df
 
 def finalize_dataframe(df, output_file):
-    selected = df[['title', 'company', 'location', 'salary_source', 'date_posted', 'description', 'job_url', 'Provincia', 'Keyword']]
-    selected.rename(columns={
-        'title': 'Job Title',
-        'company': 'Company Name',
-        'location': 'Location',
-        'salary_source': 'Salary',
-        'date_posted': 'Posted Day',
-        'description': 'Job Description',
-        'job_url': 'job url'
-    }, inplace=True)
+    selected = select_output_columns(df)
 
     selected.to_csv(output_file, index=False, encoding='utf-8-sig')
     print(f"✅ Final dataset saved: {output_file}")
     print(selected.head())
 
 if __name__ == "__main__":
-    start_time = time.time()
-    # Step 1: Load input
-    keywords = load_list_from_file(KEYWORDS_PATH)
-    locations = load_list_from_file(LOCATIONS_PATH)
-
-    # Step 2: Scrape jobs
-    run_jobspy_scraper(keywords, locations)
-
-    # Step 3: Load, clean, and save final data
-    final_df = load_and_clean_csv_files(OUTPUT_DIR)
-    if not final_df.empty:
-        finalize_dataframe(final_df, FINAL_OUTPUT)
-    
-    tend_time = time.time()
-    elapsed_time = tend_time - start_time
-    print(f"Total execution time: {elapsed_time:.2f} seconds")
+    with metrics.stage("scrape_jobspy") as run:
+        # Step 1: Load input
+        keywords = load_list_from_file(KEYWORDS_PATH)
+        locations = load_list_from_file(LOCATIONS_PATH)
+
+        # Step 2: Scrape jobs
+        run_jobspy_scraper(keywords, locations)
+
+        # Step 3: Load, clean, and save final data
+        final_df = load_and_clean_csv_files(OUTPUT_DIR)
+        if not final_df.empty:
+            finalize_dataframe(final_df, FINAL_OUTPUT)
+        run.rows_out = len(final_df)
+    metrics.export("scrape_jobspy")
@@ -3,6 +3,8 @@ import os
 import logging
 import re
 
+import metrics
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -18,16 +20,16 @@ def clean_job_description_for_llm(text):
     # Remove special formatting characters (e.g., asterisks, quotes)
     text = re.sub(r'[*"“”<>]', '', text)
 
-   # Limpiar espacios extra
-    text = re.sub(r'\s+', ' ', text).strip()
-
-    # Remove excess blank lines
-    text = re.sub(r'\n{3,}', '\n', text)
+   # Limpiar espacios extra (line breaks are kept: the trimming step reads section headings)
+    text = re.sub(r'[^\S\n]+', ' ', text).strip()
 
     # Strip spaces on each line and join
     lines = [line.strip() for line in text.split('\n')]
     cleaned = "\n".join(lines)
 
+    # Remove excess blank lines
+    cleaned = re.sub(r'\n{3,}', '\n\n', cleaned)
+
     return cleaned.strip()
 
 
@@ -57,6 +59,20 @@ def clean_data(df):
     return df
 
 
+def clean_record(record):
+    """Record-level version of clean_data, used by the streaming pipeline."""
+    cleaned = {}
+    for column, value in record.items():
+        if isinstance(value, str):
+            value = value.strip()
+            if value == '':
+                value = None
+        cleaned[column] = value
+    if 'Job Description' in cleaned:
+        cleaned['Job Description'] = clean_job_description_for_llm(cleaned['Job Description'])
+    return cleaned
+
+
 def main():
     try:
         df1 = pd.read_csv("src/data_gathering/Jobs-Data_Scraped.csv")
@@ -65,15 +81,19 @@ def main():
         logging.error(f"Missing file: {e}")
         return
 
-    logging.info("Combining datasets...")
-    combined_df = pd.concat([df1, df2], ignore_index=True)
+    with metrics.stage("clean_data") as run:
+        logging.info("Combining datasets...")
+        combined_df = pd.concat([df1, df2], ignore_index=True)
+        run.rows_in = len(combined_df)
 
-    logging.info("Cleaning data...")
-    cleaned_df = clean_data(combined_df)
+        logging.info("Cleaning data...")
+        cleaned_df = clean_data(combined_df)
+        run.rows_out = len(cleaned_df)
 
-    output_file = os.path.join("src", "data_gathering", "Jobs-Data_Cleaned.csv")
-    cleaned_df.to_csv(output_file, index=False, encoding='utf-8-sig')
-    logging.info(f"Cleaned data saved to: {output_file}")
+        output_file = os.path.join("src", "data_gathering", "Jobs-Data_Cleaned.csv")
+        cleaned_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+        logging.info(f"Cleaned data saved to: {output_file}")
+    metrics.export("clean_data")
 
 
 if __name__ == "__main__":
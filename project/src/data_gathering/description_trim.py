@@ -0,0 +1,178 @@
+import os
+import re
+
+import pandas as pd
+
+
+# ---------- CONFIG ---------- #
+# Max input tokens sent to the LLM per description (override with LLM_INPUT_TOKEN_BUDGET)
+TOKEN_BUDGET = int(os.getenv("LLM_INPUT_TOKEN_BUDGET", "1200"))
+CHARS_PER_TOKEN = 4  # rough average for llama-style tokenizers on English text
+DUPLICATE_SIMILARITY = 0.9  # word-set Jaccard above which two sentences (same anchors) are the same content
+TRANSLATION_SIMILARITY = 0.7  # anchor Jaccard above which a French sentence repeats an English one
+BOILERPLATE_MAX_CHARS = 300  # longer chunks are unsplit text, never dropped as one boilerplate sentence
+# ---------------------------- #
+
+# Headings that open sections with no impact on the extracted fields
+BOILERPLATE_HEADINGS = re.compile(
+    r"^\s*(about (?!(the |this |our )?(role|job|position|opportunity|you)\b)[\w&.\- ]{1,40}|who we are|our (company|story|mission|values)|"
+    r"what we offer|why (join|work)( us| with us)?|benefits|perks|what'?s in it for you|"
+    r"equal (employment )?opportunit(y|ies)|diversity|accommodations?|privacy|"
+    r"[àa] propos de nous|avantages|ce que nous offrons)\b.{0,40}$",
+    re.IGNORECASE,
+)
+
+# Sentences dropped wherever they appear: hiring-process and EEO statements with no other meaning
+BOILERPLATE_SENTENCES = re.compile(
+    r"equal opportunity employer|equal employment opportunit|eeo\b|affirmative action employer|"
+    r"without regard to (race|age|sex)|regardless of (race|age|gender)|race, (colou?r|religion)|"
+    r"accommodations? (is|are) available|request an accommodation|"
+    r"only (candidates|applicants) selected|we thank all applicants|will be contacted|"
+    r"founded in (18|19|20)\d\d|privacy (policy|notice)|"
+    r"[ée]galit[ée] en mati[èe]re d'emploi|seuls? les candidat",
+    re.IGNORECASE,
+)
+
+# Benefit and diversity terms, also found in requirements ("health insurance claims data"): dropped
+# only next to benefits or employer wording
+BENEFIT_TERMS = re.compile(
+    r"sexual orientation|gender identity|protected (veteran|characteristic|status)|persons with disabilities|"
+    r"diverse and inclusive|diversity|dental (care|insurance|coverage|plan)|vision (care|insurance|coverage)|"
+    r"health (insurance|benefits|spending)|life insurance|rrsp|pension plan|paid time off|vacation days|"
+    r"wellness (program|allowance)|employee assistance|background check|assurances? collectives?",
+    re.IGNORECASE,
+)
+BENEFIT_CONTEXT = re.compile(
+    r"\b(we offer|we provide|offers?|offering|eligible|eligibility|coverage|perks|"
+    r"benefits? (include|package|such as)|(our|full|group|comprehensive|competitive|flexible) benefits|"
+    r"you('ll| will) (enjoy|receive|get|have access)|access to|employer|committed to|we (welcome|encourage|value)|"
+    r"subject to|must (pass|undergo|complete)|nous offrons)\b",
+    re.IGNORECASE,
+)
+# A sentence asking for experience or describing the work is never boilerplate
+REQUIREMENT_WORDS = re.compile(
+    r"\b(experience[ds]?|knowledge|proficien\w*|familiar\w*|expertise|skills?|ability to|understanding of|"
+    r"degree|years?|you will (build|develop|design|analy[sz]e|create|lead|maintain|model|work))\b",
+    re.IGNORECASE,
+)
+
+FRENCH_STOPWORDS = {"le", "la", "les", "des", "du", "de", "et", "est", "une", "un", "pour", "dans",
+                    "avec", "nous", "vous", "sur", "au", "aux", "ou", "qui", "que", "en", "votre", "notre"}
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (no tokenizer dependency): characters / CHARS_PER_TOKEN."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+def split_sentences(text):
+    """
+    Splits on sentence punctuation and line breaks, keeping the pieces non-empty. Scraped text often
+    lacks the space after a period ("...solutions.This is a full-time position"), so a period between
+    a lower-case and an upper-case letter also ends a sentence.
+    """
+    pieces = re.split(r"(?<=[.!?;])\s+|(?<=[a-z][.!?])(?=[A-Z])|\n+", text)
+    return [piece.strip() for piece in pieces if piece and piece.strip()]
+
+
+def _words(sentence):
+    return set(re.findall(r"\w+", sentence.lower()))
+
+
+def _is_french(words):
+    return len(words) >= 4 and len(words & FRENCH_STOPWORDS) / len(words) > 0.2
+
+
+def _anchors(sentence, skip_first=True):
+    """
+    Language-independent tokens (numbers, names, acronyms, tools) shared by a sentence and its translation.
+    The first word is capitalized anyway, so it is skipped unless the whole sentence is compared.
+    """
+    tokens = re.findall(r"[\w+#.]*[A-Z0-9][\w+#.]*", sentence)[1 if skip_first else 0:]
+    return {token.strip(".").lower() for token in tokens if token.strip(".")}
+
+
+def _is_translation_of(sentence, english_sentence):
+    anchors, english_anchors = _anchors(sentence), _anchors(english_sentence)
+    if len(anchors) < 3 or not english_anchors:
+        return False
+    ratio = len(sentence) / max(1, len(english_sentence))
+    return 0.5 <= ratio <= 2 and len(anchors & english_anchors) / len(anchors | english_anchors) >= TRANSLATION_SIMILARITY
+
+
+def is_boilerplate_sentence(sentence):
+    if len(sentence) > BOILERPLATE_MAX_CHARS or REQUIREMENT_WORDS.search(sentence):
+        return False
+    if BOILERPLATE_SENTENCES.search(sentence):
+        return True
+    return bool(BENEFIT_TERMS.search(sentence) and BENEFIT_CONTEXT.search(sentence))
+
+
+def drop_boilerplate_sections(text):
+    """
+    Removes boilerplate sections (heading line up to the next heading) from multi-line text. The clean
+    and translate stages keep the line breaks of the scraped description for this.
+    """
+    kept = []
+    skipping = False
+    for line in text.split("\n"):
+        stripped = line.strip()
+        is_heading = 0 < len(stripped) <= 60 and not stripped.endswith((".", ","))
+        if is_heading:
+            skipping = bool(BOILERPLATE_HEADINGS.match(stripped))
+        if not skipping:
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def collapse_duplicates(sentences):
+    """
+    Drops repeated content: near-identical sentences naming the same numbers, names and tools (so
+    "experience with AWS" and "experience with Azure" are both kept), and French sentences of a
+    bilingual posting that repeat a kept English sentence (same anchors, similar length).
+    French sentences without an English counterpart are kept, the LLM reads French.
+    """
+    word_sets = [_words(sentence) for sentence in sentences]
+    french = [_is_french(words) for words in word_sets]
+
+    kept, kept_keys = [], []
+    english = [sentence for sentence, is_fr in zip(sentences, french) if not is_fr]
+    for sentence, words, is_fr in zip(sentences, word_sets, french):
+        if is_fr and any(_is_translation_of(sentence, english_sentence) for english_sentence in english):
+            continue
+        anchors = _anchors(sentence, skip_first=False)
+        if words and any(anchors == seen_anchors and len(words & seen) / len(words | seen) >= DUPLICATE_SIMILARITY
+                         for seen, seen_anchors in kept_keys):
+            continue
+        kept.append(sentence)
+        kept_keys.append((words, anchors))
+    return kept
+
+
+def trim_description(text, token_budget=TOKEN_BUDGET):
+    """
+    Prepares a description for the LLM: removes boilerplate sections and sentences, collapses
+    duplicated bilingual blocks and caps the result at token_budget.
+    Returns (trimmed_text, tokens_before, tokens_after).
+    """
+    if pd.isna(text) or not str(text).strip():
+        return text, 0, 0
+    text = str(text)
+    tokens_before = estimate_tokens(text)
+
+    sentences = split_sentences(drop_boilerplate_sections(text))
+    sentences = [sentence for sentence in sentences if not is_boilerplate_sentence(sentence)]
+    sentences = collapse_duplicates(sentences)
+
+    kept, budget_chars = [], token_budget * CHARS_PER_TOKEN
+    for sentence in sentences:
+        if budget_chars - len(sentence) < 0:
+            if not kept:
+                kept.append(sentence[:budget_chars])
+            break
+        kept.append(sentence)
+        budget_chars -= len(sentence) + 1  # + separator
+
+    # Never send an empty prompt because every sentence looked like boilerplate
+    trimmed = "\n".join(kept) if kept else text[: token_budget * CHARS_PER_TOKEN]
+    return trimmed, tokens_before, estimate_tokens(trimmed)
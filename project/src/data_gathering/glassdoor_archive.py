@@ -0,0 +1,73 @@
+"""
+Raw-capture archive of the Glassdoor pages seen by the scraper.
+
+When GLASSDOOR_CAPTURE_DIR is set, GlassdoorDataGathering.py writes one zstd-compressed JSON-lines file
+per run (glassdoor_<timestamp>.jsonl.zst) holding, for every job card, the card HTML and the detail-pane
+HTML it was parsed from. `GlassdoorDataGathering.py --replay <archives>` feeds them back through the same
+parsing functions without a browser.
+"""
+
+import io
+import os
+import json
+import logging
+from datetime import datetime, timezone
+
+import zstandard
+
+
+# ---------- CONFIG ---------- #
+CAPTURE_DIR = os.getenv("GLASSDOOR_CAPTURE_DIR")
+COMPRESSION_LEVEL = int(os.getenv("GLASSDOOR_CAPTURE_LEVEL", "10"))
+# ---------------------------- #
+
+
+class CaptureWriter:
+    """Appends captured cards to a zstd stream; each record is flushed so a crashed run stays readable."""
+
+    def __init__(self, path, level=COMPRESSION_LEVEL):
+        self.path = path
+        self.records = 0
+        self._file = open(path, "wb")
+        self._writer = zstandard.ZstdCompressor(level=level).stream_writer(self._file)
+
+    @classmethod
+    def for_run(cls, directory=CAPTURE_DIR):
+        """Returns a writer for a new per-run archive, or None when capturing is off."""
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"glassdoor_{datetime.now().strftime('%Y%m%dT%H%M%S')}.jsonl.zst")
+        print(f"Capturing raw Glassdoor HTML to: {path}")
+        return cls(path)
+
+    def write(self, keyword, providence, card_html, detail_html):
+        record = {
+            "captured_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "keyword": keyword,
+            "providence": providence,
+            "card_html": card_html,
+            "detail_html": detail_html,
+        }
+        self._writer.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        # A block flush keeps the compression window, so repeated markup still compresses well
+        self._writer.flush(zstandard.FLUSH_BLOCK)
+        self.records += 1
+
+    def close(self):
+        self._writer.close()  # also closes the underlying file
+        print(f"{self.records} captured job cards saved to: {self.path}")
+
+
+def read_archive(path):
+    """Yields the captured records of one archive; a truncated tail (crashed run) is skipped."""
+    with open(path, "rb") as file:
+        reader = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(file), encoding="utf-8")
+        try:
+            for line in reader:
+                if not line.endswith("\n"):
+                    logging.warning(f"{path}: incomplete last record skipped")
+                    break
+                yield json.loads(line)
+        except zstandard.ZstdError as e:
+            logging.warning(f"{path}: archive truncated ({e}), records read so far are kept")
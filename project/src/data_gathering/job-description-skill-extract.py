@@ -17,9 +17,14 @@ import os
 import logging
 import re
 from openai import OpenAI
-import time
 
-start_time = time.time()
+from description_trim import TOKEN_BUDGET, trim_description
+import metrics
+from throttle import get_endpoint, process_with_requeue
+from skill_taxonomy import SkillTaxonomy, add_skill_id_columns
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 var_experience_level = "Experience Level"
 var_tipe_of_contract = "Type of Contract"
@@ -28,22 +33,12 @@ var_education_level = "Education level"
 client = OpenAI(
 base_url='http://host.docker.internal:11434/v1/',
 api_key='ollama',)
+llm_endpoint = get_endpoint("ollama")
 
 # Input and output file paths
 input_file = "src/data_gathering/Dataset_Full.csv"
 output_file = "src/data_gathering/Dataset_Full_Parsed.csv"
 
-# Check if input file exists
-if not os.path.isfile(input_file):
-    raise FileNotFoundError(f"The file '{input_file}' does not exist.")
-
-# Read the dataset
-df = pd.read_csv(input_file, encoding='utf-8-sig')
-
-# Validate necessary columns
-if "Job Description" not in df.columns:
-    raise ValueError("The 'Job Description' column is missing in the file.")
-
 def extract_field(content, label):
     """
     Regex pattern to capture exactly one line of text after the label.
@@ -73,69 +68,112 @@ def parse_raw_content(content: str):
 
 
 # Function to process a single job description
+# LLM errors are raised (after the endpoint's retries) so the row can be re-queued
 def process_job_description(description: str):
     if pd.isna(description) or not description.strip():
         return "N/A", "N/A", "N/A", "N/A", "N/A"
 
     # Example usage of a local OLlama endpoint with your custom client
-    try:
-        response = client.chat.completions.create(
-        model="llama3.2",
-        messages=[
-            {"role": "system",
-             "content": (
-                "You are a data assistant who is able to understand French and English. "
-                "Extract and categorize the information from the following job description. "
-                "Separate the details into the following categories:\n"
-                "1. keywords (list of keyword and skills that you think is important to find or match this job descriptios).\n"
-                "2. Must-have skills (technical skills and keywords explicitly required in the description).\n"
-                "3. Nice-to-have skills (other skills that are preferred but not mandatory, including soft skills).\n"
-                "4. Experience Level (categorize as 'Junior' (< 3 years), 'Mid-level' (3-8 years), or 'Senior' (> 8 years)).\n"
-                "5. Type of Contract (e.g., 'Full-Time', 'Part-Time', 'Contract', or 'Internship').\n"
-                "6. Education Level (level of education required in the job description).\n\n"
-                "Return the OUTPUT in EXACTLY this format in English (each category on its own line, no empty lines):\n"
-                "Must-have skills: <list of technical skills and keywords, comma-separated>\n"
-                "Nice-to-have skills: <list of additional skills, comma-separated>\n"
-                "Experience Level: <Junior / Mid-level / Senior>\n"
-                "Type of Contract: <Full-Time / Part-Time / Contract / Internship>\n"
-                "Education level: <education level required>\n\n"
-                "Do not add any explanation or extra comments. Respond only with the categorized output."
-                "IMPORTANT\n"
-                "Use this exact structure."
-                "If any category is not mentioned in the description, write Not specified\n"
-                "Do not return anything outside of this format.")},
-            {"role": "user",
-            "content": f"Job Description:\n{description}"
-            }],
-        max_tokens=1500,
-        temperature=0.4)
-        
-        # OLlama-style response (similar to OpenAI):
-        content = response.choices[0].message.content
-        print("Raw Content:", content) 
-        return parse_raw_content(content)
-
-    except Exception as e:
-        logging.error(f"Error extracting details: {e}")
-        return "N/A", "N/A", "N/A", "N/A", "N/A"
-
-# Initialize new columns
-df["Must-have Skills"] = "N/A"
-df["Nice-to-have Skills"] = "N/A"
-df[var_experience_level] = "N/A"
-df[var_tipe_of_contract] = "N/A"
-df[var_education_level] = "N/A"
-
-# Process each job description
-df[["Must-have Skills", "Nice-to-have Skills", "Experience Level", "Type of Contract", "Education level"]] = \
-    df["Job Description"].apply(lambda desc: pd.Series(process_job_description(desc)))
-
-
-# Save the updated dataset
-df.to_csv(output_file, index=False, encoding="utf-8")
-
-end_time = time.time()
-
-print(f"Time taken: {end_time - start_time:.2f} seconds")
-
-print(f"Updated dataset saved to: {output_file}")
\ No newline at end of file
+    response = llm_endpoint.call(
+    client.chat.completions.create,
+    model="llama3.2",
+    messages=[
+        {"role": "system",
+         "content": (
+            "You are a data assistant who is able to understand French and English. "
+            "Extract and categorize the information from the following job description. "
+            "Separate the details into the following categories:\n"
+            "1. keywords (list of keyword and skills that you think is important to find or match this job descriptios).\n"
+            "2. Must-have skills (technical skills and keywords explicitly required in the description).\n"
+            "3. Nice-to-have skills (other skills that are preferred but not mandatory, including soft skills).\n"
+            "4. Experience Level (categorize as 'Junior' (< 3 years), 'Mid-level' (3-8 years), or 'Senior' (> 8 years)).\n"
+            "5. Type of Contract (e.g., 'Full-Time', 'Part-Time', 'Contract', or 'Internship').\n"
+            "6. Education Level (level of education required in the job description).\n\n"
+            "Return the OUTPUT in EXACTLY this format in English (each category on its own line, no empty lines):\n"
+            "Must-have skills: <list of technical skills and keywords, comma-separated>\n"
+            "Nice-to-have skills: <list of additional skills, comma-separated>\n"
+            "Experience Level: <Junior / Mid-level / Senior>\n"
+            "Type of Contract: <Full-Time / Part-Time / Contract / Internship>\n"
+            "Education level: <education level required>\n\n"
+            "Do not add any explanation or extra comments. Respond only with the categorized output."
+            "IMPORTANT\n"
+            "Use this exact structure."
+            "If any category is not mentioned in the description, write Not specified\n"
+            "Do not return anything outside of this format.")},
+        {"role": "user",
+        "content": f"Job Description:\n{description}"
+        }],
+    max_tokens=1500,
+    temperature=0.4)
+    
+    # OLlama-style response (similar to OpenAI):
+    content = response.choices[0].message.content
+    print("Raw Content:", content) 
+    return parse_raw_content(content)
+
+def main():
+    with metrics.stage("extract_skills") as run:
+        run_extraction(run)
+    metrics.export("extract_skills")
+
+
+def run_extraction(run):
+    # Check if input file exists
+    if not os.path.isfile(input_file):
+        raise FileNotFoundError(f"The file '{input_file}' does not exist.")
+
+    # Read the dataset
+    df = pd.read_csv(input_file, encoding='utf-8-sig')
+
+    # Validate necessary columns
+    if "Job Description" not in df.columns:
+        raise ValueError("The 'Job Description' column is missing in the file.")
+
+    run.rows_in = len(df)
+
+    # Initialize new columns
+    df["Must-have Skills"] = "N/A"
+    df["Nice-to-have Skills"] = "N/A"
+    df[var_experience_level] = "N/A"
+    df[var_tipe_of_contract] = "N/A"
+    df[var_education_level] = "N/A"
+
+    # Remove boilerplate and duplicated bilingual blocks, then cap each input at the token budget
+    llm_inputs = []
+    tokens_before_total = tokens_after_total = 0
+    for row_index, description in df["Job Description"].items():
+        trimmed, tokens_before, tokens_after = trim_description(description, TOKEN_BUDGET)
+        llm_inputs.append(trimmed)
+        tokens_before_total += tokens_before
+        tokens_after_total += tokens_after
+        logging.info(f"Row {row_index}: {tokens_before} -> {tokens_after} tokens ({tokens_before - tokens_after} saved)")
+    logging.info(f"Pre-trimming saved {tokens_before_total - tokens_after_total} of {tokens_before_total} input tokens "
+                 f"(budget {TOKEN_BUDGET} tokens per description)")
+    metrics.increment("llm_input_tokens_before_trim", tokens_before_total)
+    metrics.increment("llm_input_tokens_sent", tokens_after_total)
+
+    # Process each job description, failed rows are re-queued for later passes
+    results, failures = process_with_requeue(
+        dict(zip(df.index, llm_inputs)), process_job_description, workers=llm_endpoint.max_concurrency,
+        endpoint=llm_endpoint)
+    if failures:
+        logging.error(f"{len(failures)} descriptions could not be processed by the LLM and are left as N/A.")
+    extracted = [results.get(index, ("N/A", "N/A", "N/A", "N/A", "N/A")) for index in df.index]
+    df[["Must-have Skills", "Nice-to-have Skills", "Experience Level", "Type of Contract", "Education level"]] = \
+        pd.DataFrame(extracted, index=df.index)
+    logging.info(f"LLM endpoint stats: {llm_endpoint.stats}")
+    metrics.increment("llm_failed_rows", len(failures))
+    run.rows_out = len(results)
+
+    # Map the free-text skills to canonical skill ids (integer arrays next to the display strings)
+    taxonomy = SkillTaxonomy.load()
+    df = add_skill_id_columns(df, taxonomy)
+
+    # Save the updated dataset
+    df.to_csv(output_file, index=False, encoding="utf-8")
+
+    print(f"Updated dataset saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,71 +11,214 @@
 
 import os
 import sys
+import json
+import hashlib
 import logging
 import pymongo
 import pandas as pd
+from pymongo import InsertOne, ReplaceOne, DeleteOne
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv, find_dotenv
 
-# Loading environment variables from .env file
-load_dotenv(find_dotenv())
+import metrics
 
-# Getting MongoDB connection string
-connection_string = os.environ.get("url")
-if not connection_string:
-    logging.error("MongoDB connection string is missing. Set the 'url' environment variable.")
-    sys.exit(1)
+from skill_aggregates import (
+    SKILL_TYPES,
+    aggregates_need_rebuild,
+    apply_deltas,
+    ensure_aggregate_indexes,
+    mark_aggregates_stale,
+    normalize_posted_day,
+    rebuild_aggregates,
+)
+from skill_taxonomy import SKILL_ID_COLUMNS, SkillTaxonomy, parse_skill_ids
 
-# MongoDB connection with proper error handling
-try:
-    with pymongo.MongoClient(connection_string, serverSelectionTimeoutMS=5000) as client:
-        # Checking connection
-        client.admin.command("ping")
-        logging.info("Successfully connected to MongoDB Atlas! 🎉")
+# Fields kept from existing documents to diff a load and reverse their aggregate counts
+AGGREGATE_FIELDS = (["job_key", "content_hash", "Provincia", "Keyword", "Experience Level", "Posted Date"]
+                    + list(SKILL_TYPES) + list(SKILL_ID_COLUMNS.values()))
 
-        # Selecting database and collection
-        db = client.jobsDB
-        collection = db.jobsCollectionTest
 
-        # Clearing the collection before inserting new data
-        deleted_count = collection.delete_many({}).deleted_count
-        logging.info(f"Deleted {deleted_count} existing documents from 'jobsCollection'.")
+def make_job_key(record):
+    """Uses the job url as the document key, falling back to a hash of title, company and location."""
+    url = record.get("job url")
+    if isinstance(url, str) and url.strip() and url.strip() != "N/A":
+        return url.strip()
+    identity = "|".join(str(record.get(field, "")) for field in ("Job Title", "Company Name", "Location"))
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
 
-        # Loading CSV file
-        csv_file_path = "src/data_gathering/Dataset_Full_Parsed.csv"
-        if not os.path.exists(csv_file_path):
-            logging.error(f"CSV file not found: {csv_file_path}")
-            sys.exit(1)
 
+# Fields left out of content_hash: derived keys and the relative posting age, which changes every day
+HASH_EXCLUDED_FIELDS = {"job_key", "content_hash", "Posted Day", "Posted Date", "index"}
+
+
+def is_business_field(field):
+    """False for bookkeeping columns, including the pandas index columns saved by to_csv ("Unnamed: 0")."""
+    return field not in HASH_EXCLUDED_FIELDS and not str(field).startswith("Unnamed:")
+
+
+def content_hash(record):
+    """Stable hash of a record's business fields, used to detect updated postings."""
+    payload = json.dumps({field: value for field, value in record.items() if is_business_field(field)},
+                         sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def prepare_records(data, taxonomy):
+    """Converts the DataFrame to documents keyed by job_key (last occurrence wins)."""
+    records = {}
+    for record in data.to_dict(orient="records"):
+        # Skill ids are stored as integer arrays; older CSVs without them are encoded here
+        for text_column, id_column in SKILL_ID_COLUMNS.items():
+            if id_column in record:
+                record[id_column] = parse_skill_ids(record[id_column])
+            else:
+                record[id_column] = taxonomy.encode(record.get(text_column))
+        record["job_key"] = make_job_key(record)
+        record["Posted Date"] = normalize_posted_day(record.get("Posted Day"))
+        record["content_hash"] = content_hash(record)
+        records[record["job_key"]] = record
+    return records
+
+
+def sync_jobs(db, collection, records, taxonomy, expire_missing=True):
+    """
+    Inserts new postings, replaces changed ones and (optionally) deletes the ones missing from
+    this load, then applies the same changes to the skill demand aggregates.
+    On a BulkWriteError the writes that went through are still counted in the aggregates, then the
+    error is raised again.
+    """
+    rebuild = aggregates_need_rebuild(db)
+
+    # Documents written by the previous delete-and-insert loader have no key and cannot be diffed
+    unkeyed = collection.delete_many({"job_key": {"$exists": False}}).deleted_count
+    if unkeyed:
+        logging.info(f"Removed {unkeyed} documents without job_key from a previous load.")
+
+    projection = {field: 1 for field in AGGREGATE_FIELDS}
+    projection["_id"] = 0
+    # Without expiry only the documents touched by this load are needed
+    query = {} if expire_missing else {"job_key": {"$in": list(records)}}
+    existing = {doc["job_key"]: doc for doc in collection.find(query, projection)}
+
+    operations, changes = [], []  # changes[i]: (kind, document(s)) written by operations[i]
+    for key, record in records.items():
+        old_doc = existing.get(key)
+        if old_doc is None:
+            changes.append(("inserted", record))
+            operations.append(InsertOne(dict(record)))
+        elif old_doc.get("content_hash") != record["content_hash"]:
+            changes.append(("updated", (old_doc, record)))
+            operations.append(ReplaceOne({"job_key": key}, dict(record)))
+
+    if expire_missing:
+        for key, old_doc in existing.items():
+            if key not in records:
+                changes.append(("expired", old_doc))
+                operations.append(DeleteOne({"job_key": key}))
+
+    write_error, failed = None, set()
+    if operations:
         try:
-            data = pd.read_csv(csv_file_path)
-            logging.info(f"CSV file '{csv_file_path}' successfully loaded.")
-        except Exception as e:
-            logging.error(f"Error reading the CSV file: {e}")
-            sys.exit(1)
-
-        # Converting DataFrame to a list of dictionaries
-        data_dict = data.to_dict(orient="records")
-        if not data_dict:
-            logging.warning("CSV file is empty, no data inserted.")
+            collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as bwe:
+            # Unordered writes: every operation not listed in writeErrors was applied
+            write_error = bwe
+            failed = {error["index"] for error in bwe.details.get("writeErrors", [])}
+            logging.error(f"{len(failed)} of {len(operations)} writes failed, counting the others.")
+        except Exception:
+            mark_aggregates_stale(db, "bulk write to the jobs collection failed")
+            raise
+    applied = [change for i, change in enumerate(changes) if i not in failed]
+    inserted = [doc for kind, doc in applied if kind == "inserted"]
+    updated = [docs for kind, docs in applied if kind == "updated"]
+    expired = [doc for kind, doc in applied if kind == "expired"]
+    logging.info(f"Load summary: {len(inserted)} inserted, {len(updated)} updated, {len(expired)} expired.")
+    metrics.increment("documents_inserted", len(inserted))
+    metrics.increment("documents_updated", len(updated))
+    metrics.increment("documents_expired", len(expired))
+
+    try:
+        if rebuild:
+            logging.info("Aggregate collections are empty or outdated, rebuilding them from the jobs collection.")
+            rebuild_aggregates(db, collection, taxonomy)
         else:
-            # Inserting the new data into MongoDB
+            ensure_aggregate_indexes(db)
+            apply_deltas(db, inserted, updated, expired, taxonomy)
+    except Exception:
+        mark_aggregates_stale(db, "aggregate update after a load failed")
+        raise
+    if write_error is not None:
+        raise write_error
+    return inserted, updated, expired
+
+
+def main():
+    # Loading environment variables from .env file
+    load_dotenv(find_dotenv())
+
+    # Getting MongoDB connection string
+    connection_string = os.environ.get("url")
+    if not connection_string:
+        logging.error("MongoDB connection string is missing. Set the 'url' environment variable.")
+        sys.exit(1)
+
+    # MongoDB connection with proper error handling
+    try:
+        with pymongo.MongoClient(connection_string, serverSelectionTimeoutMS=5000) as client:
+            # Checking connection
+            client.admin.command("ping")
+            logging.info("Successfully connected to MongoDB Atlas! 🎉")
+
+            # Selecting database and collection
+            db = client.jobsDB
+            collection = db.jobsCollectionTest
+            collection.create_index("job_key", unique=True)
+
+            # Loading CSV file
+            csv_file_path = "src/data_gathering/Dataset_Full_Parsed.csv"
+            if not os.path.exists(csv_file_path):
+                logging.error(f"CSV file not found: {csv_file_path}")
+                sys.exit(1)
+
             try:
-                collection.insert_many(data_dict, ordered=False)
-                logging.info(f"{len(data_dict)} documents inserted into 'jobsCollection'.")
-            except pymongo.errors.BulkWriteError as bwe:
-                logging.error(f"Error inserting documents: {bwe.details}")
+                data = pd.read_csv(csv_file_path)
+                logging.info(f"CSV file '{csv_file_path}' successfully loaded.")
             except Exception as e:
-                logging.error(f"Unexpected error while inserting documents: {e}")
+                logging.error(f"Error reading the CSV file: {e}")
                 sys.exit(1)
 
-        # Verify inserted data
-        logging.info("Verifying inserted documents:")
-        for doc in collection.find({}, {"_id": 0}):  # Hide `_id` for cleaner output
-            logging.info(doc)
-
-except pymongo.errors.ServerSelectionTimeoutError:
-    logging.error("Could not connect to MongoDB. Check your connection string and network.")
-    sys.exit(1)
-except Exception as e:
-    logging.error(f"Unexpected error: {e}")
-    sys.exit(1)
+            with metrics.stage("load_to_mongo") as run:
+                run.rows_in = len(data)
+                # Converting DataFrame to documents keyed by job_key
+                taxonomy = SkillTaxonomy.load()
+                records = prepare_records(data, taxonomy)
+                if not records:
+                    logging.warning("CSV file is empty, no data inserted.")
+                else:
+                    # Inserting new, replacing updated and removing expired documents
+                    try:
+                        inserted, updated, _ = sync_jobs(db, collection, records, taxonomy)
+                        taxonomy.save()
+                        run.rows_out = len(inserted) + len(updated)
+                    except pymongo.errors.BulkWriteError as bwe:
+                        logging.error(f"Error inserting documents: {bwe.details}")
+                    except Exception as e:
+                        logging.error(f"Unexpected error while inserting documents: {e}")
+                        sys.exit(1)
+            metrics.export("load_to_mongo")
+
+            # Verify inserted data
+            logging.info("Verifying inserted documents:")
+            for doc in collection.find({}, {"_id": 0}):  # Hide `_id` for cleaner output
+                logging.info(doc)
+
+    except pymongo.errors.ServerSelectionTimeoutError:
+        logging.error("Could not connect to MongoDB. Check your connection string and network.")
+        sys.exit(1)
+    except Exception as e:
+        logging.error(f"Unexpected error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Shared instrumentation for the pipeline scripts and the DAG (standard library only).
+
+Record:
+    with metrics.stage("clean_data") as run:      # wall time, rows in/out, rows/sec
+        run.rows_in = len(df)
+        ...
+        run.rows_out = len(cleaned)
+    with metrics.timed("webdriver", action="card_click"):   # latency histogram
+        ...
+    metrics.cache_access("translation", hit=True)             # cache hit rate
+    metrics.increment("documents_inserted", 42)               # counters
+
+Export at the end of a script with metrics.export("clean_data"):
+  - Prometheus textfile in METRICS_TEXTFILE_DIR (for node_exporter's textfile collector),
+  - StatsD over UDP when STATSD_HOST is set (the statsd-exporter in the README),
+  - a JSON summary at METRICS_XCOM_FILE, which the DAG's run_script pushes to XCom.
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+
+
+# ---------- CONFIG ---------- #
+PREFIX = "jobpipeline"
+TEXTFILE_DIR = os.getenv("METRICS_TEXTFILE_DIR")
+STATSD_HOST = os.getenv("STATSD_HOST")
+STATSD_PORT = int(os.getenv("STATSD_PORT", "8125"))
+XCOM_FILE = os.getenv("METRICS_XCOM_FILE")
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# ---------------------------- #
+
+_lock = threading.Lock()
+_stages = {}
+_histograms = {}
+_caches = {}
+_counters = {}
+
+
+class StageRun:
+    def __init__(self, name):
+        self.name = name
+        self.rows_in = None
+        self.rows_out = None
+        self.seconds = None
+
+    def as_dict(self):
+        rows = self.rows_out if self.rows_out is not None else self.rows_in
+        rate = rows / self.seconds if rows is not None and self.seconds else None
+        return {"seconds": round(self.seconds, 3), "rows_in": self.rows_in, "rows_out": self.rows_out,
+                "rows_per_second": round(rate, 3) if rate is not None else None}
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (Prometheus-style approximation)."""
+        target, seen = q * self.count, 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.counts):
+            seen += count
+            if seen >= target and count:
+                return bound
+        return None
+
+    def as_dict(self):
+        return {"count": self.count, "sum": round(self.total, 3),
+                "avg": round(self.total / self.count, 4) if self.count else None,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95)}
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+@contextmanager
+def stage(name):
+    """Times a pipeline stage; set rows_in / rows_out on the yielded object."""
+    run = StageRun(name)
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run.seconds = time.perf_counter() - start
+        with _lock:
+            _stages[name] = run
+        summary = run.as_dict()
+        logging.info(f"Stage {name}: {summary['seconds']}s, rows in {run.rows_in}, rows out {run.rows_out}, "
+                     f"{summary['rows_per_second']} rows/s")
+
+
+def observe(name, seconds, **labels):
+    with _lock:
+        _histograms.setdefault(_key(name, labels), Histogram()).observe(seconds)
+
+
+@contextmanager
+def timed(name, **labels):
+    """Records the duration of the block in the `name` latency histogram (errors included)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def cache_access(name, hit):
+    with _lock:
+        stats = _caches.setdefault(name, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+
+
+def increment(name, value=1, **labels):
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _label_text(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels)
+
+
+def summary():
+    """JSON-friendly view of everything recorded in this process."""
+    with _lock:
+        def flat(key):
+            name, labels = key
+            return name + "".join(f".{value}" for _, value in labels)
+
+        return {
+            "stages": {name: run.as_dict() for name, run in _stages.items()},
+            "latency": {flat(key): histogram.as_dict() for key, histogram in _histograms.items()},
+            "cache": {name: dict(stats, hit_rate=round(stats["hits"] / max(1, stats["hits"] + stats["misses"]), 4))
+                      for name, stats in _caches.items()},
+            "counters": {flat(key): value for key, value in _counters.items()},
+        }
+
+
+def prometheus_text(job):
+    lines = []
+    with _lock:
+        stage_metrics = [("stage_duration_seconds", "seconds"), ("stage_rows_in", "rows_in"),
+                         ("stage_rows_out", "rows_out"), ("stage_rows_per_second", "rows_per_second")]
+        for metric, field in stage_metrics:
+            lines.append(f"# TYPE {PREFIX}_{metric} gauge")
+            for name, run in _stages.items():
+                value = run.as_dict()[field]
+                if value is not None:
+                    lines.append(f'{PREFIX}_{metric}{{job="{job}",stage="{name}"}} {value}')
+
+        lines.append(f"# TYPE {PREFIX}_latency_seconds histogram")
+        for (name, labels), histogram in _histograms.items():
+            label_text = _label_text((("job", job), ("name", name)) + labels)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram.counts):
+                cumulative += count
+                lines.append(f'{PREFIX}_latency_seconds_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f"{PREFIX}_latency_seconds_sum{{{label_text}}} {histogram.total}")
+            lines.append(f"{PREFIX}_latency_seconds_count{{{label_text}}} {histogram.count}")
+
+        lines.append(f"# TYPE {PREFIX}_cache_requests_total counter")
+        for name, stats in _caches.items():
+            for result in ("hits", "misses"):
+                lines.append(f'{PREFIX}_cache_requests_total{{job="{job}",cache="{name}",result="{result}"}} {stats[result]}')
+
+        lines.append(f"# TYPE {PREFIX}_events_total counter")
+        for (name, labels), value in _counters.items():
+            lines.append(f"{PREFIX}_events_total{{{_label_text((('job', job), ('name', name)) + labels)}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _send_statsd(job, data):
+    packets = []
+    for name, stats in data["stages"].items():
+        for field, value in stats.items():
+            if value is not None:
+                packets.append(f"{PREFIX}.{job}.stage.{name}.{field}:{value}|g")
+    for name, stats in data["latency"].items():
+        packets.append(f"{PREFIX}.{job}.latency.{name}.count:{stats['count']}|g")
+        packets.append(f"{PREFIX}.{job}.latency.{name}.avg_ms:{round((stats['avg'] or 0) * 1000, 1)}|g")
+    for name, stats in data["cache"].items():
+        packets.append(f"{PREFIX}.{job}.cache.{name}.hit_rate:{stats['hit_rate']}|g")
+    for name, value in data["counters"].items():
+        packets.append(f"{PREFIX}.{job}.{name}:{value}|c")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for packet in packets:
+            sock.sendto(packet.replace(" ", "_").encode("utf-8"), (STATSD_HOST, STATSD_PORT))
+    finally:
+        sock.close()
+
+
+def export(job):
+    """Writes the recorded metrics to every configured sink. Never fails the calling script."""
+    data = summary()
+    try:
+        if TEXTFILE_DIR:
+            os.makedirs(TEXTFILE_DIR, exist_ok=True)
+            path = os.path.join(TEXTFILE_DIR, f"{job}.prom")
+            with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+                file.write(prometheus_text(job))
+            os.replace(f"{path}.tmp", path)  # the textfile collector must never see a partial file
+        if STATSD_HOST:
+            _send_statsd(job, data)
+        if XCOM_FILE:
+            with open(XCOM_FILE, "w", encoding="utf-8") as file:
+                json.dump(data, file, default=str)
+    except Exception as e:
+        logging.error(f"Could not export metrics for {job}: {e}")
+    return data
@@ -0,0 +1,213 @@
+"""
+Opt-in profiling for the pipeline scripts (standard library only).
+
+Run any stage under a profiler without touching the script:
+
+    PIPELINE_PROFILE=sample python src/data_gathering/profiling.py src/data_gathering/trans.py
+
+The DAG does this when the run has the 'profile' param (or PIPELINE_PROFILE) set; with profiling off
+run_script starts the script directly, so nothing is added to normal runs.
+
+Modes (PIPELINE_PROFILE):
+  - cprofile: deterministic profiler on the main thread and every thread it starts (translation and
+              LLM workers), merged -> <stage>.pstats (+ top functions as text),
+  - sample:   samples the stacks of every thread each PIPELINE_PROFILE_INTERVAL seconds
+              -> <stage>.collapsed, the folded format read by flamegraph.pl and speedscope,
+  - memory:   traces allocations with tracemalloc -> <stage>.allocations.txt with the peak and the
+              top PIPELINE_PROFILE_TOP_N allocation sites.
+Allocation tracing slows every allocation down, so it is a separate pass: the timings of a memory run
+are not representative, and the CPU modes do not trace memory.
+
+Artifacts go to PIPELINE_PROFILE_DIR/<run id>/<stage>/, the run id being the Airflow run id
+(PIPELINE_PROFILE_RUN_ID, set by the DAG) or the start timestamp.
+"""
+
+import os
+import re
+import sys
+import time
+import runpy
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from datetime import datetime
+from collections import Counter
+from contextlib import contextmanager
+
+
+# ---------- CONFIG ---------- #
+MODES = ("cprofile", "sample", "memory")
+OFF_VALUES = ("", "0", "off", "none", "false")
+PROFILE_DIR = os.getenv("PIPELINE_PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL = float(os.getenv("PIPELINE_PROFILE_INTERVAL", "0.005"))
+TRACE_FRAMES = int(os.getenv("PIPELINE_PROFILE_TRACE_FRAMES", "5"))
+TOP_N = int(os.getenv("PIPELINE_PROFILE_TOP_N", "25"))
+# ---------------------------- #
+
+
+def profile_mode():
+    """Returns the requested mode, or None when profiling is off."""
+    mode = os.getenv("PIPELINE_PROFILE", "").strip().lower()
+    if mode in OFF_VALUES:
+        return None
+    if mode not in MODES:
+        raise ValueError(f"PIPELINE_PROFILE must be one of {', '.join(MODES)} or off, got '{mode}'")
+    return mode
+
+
+def run_directory(stage):
+    """Run-scoped artifact directory: PIPELINE_PROFILE_DIR/<run id>/<stage>."""
+    run_id = os.getenv("PIPELINE_PROFILE_RUN_ID") or datetime.now().strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(PROFILE_DIR, re.sub(r"[^\w.-]+", "_", run_id), stage)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class StackSampler:
+    """Background thread collecting the stacks of all other threads as folded (collapsed) lines."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    @staticmethod
+    def _frame_label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_label(frame))
+                    frame = frame.f_back
+                # Pool workers (ThreadPoolExecutor-0_3, translate-1) are merged into one root
+                root = re.sub(r"[-_]\d+$", "", names.get(thread_id, "thread"))
+                self.samples[";".join([root] + stack[::-1])] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.samples.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class ThreadProfilers:
+    """cProfile for every thread started while active (threading.setprofile), merged with the main one."""
+
+    def __init__(self):
+        self.main = cProfile.Profile()
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def _start_thread_profiler(self, frame, event, arg):
+        sys.setprofile(None)  # replaced by the thread's own profiler
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return  # Python 3.12+: the profiler is process-wide and the main one already sees this thread
+        with self._lock:
+            self.threads.append(profiler)
+
+    def enable(self):
+        threading.setprofile(self._start_thread_profiler)
+        self.main.enable()
+
+    def disable(self):
+        threading.setprofile(None)
+        self.main.disable()
+
+    def stats(self):
+        """Merged statistics; threads still running are included up to this point."""
+        stats = pstats.Stats(self.main)
+        with self._lock:
+            for profiler in self.threads:
+                stats.add(profiler)
+        return stats
+
+
+def _write_allocations(path, snapshot, peak, current):
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(f"Peak traced memory: {peak / 1024 ** 2:.1f} MiB, at exit: {current / 1024 ** 2:.1f} MiB\n\n")
+        file.write(f"Top {TOP_N} allocation sites still alive at exit:\n")
+        for stat in snapshot.statistics("traceback")[:TOP_N]:
+            file.write(f"\n{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+            file.write("\n".join(stat.traceback.format(most_recent_first=True)) + "\n")
+
+
+@contextmanager
+def profiled(stage, mode=None):
+    """Profiles the block when a mode is given or PIPELINE_PROFILE is set; otherwise does nothing."""
+    mode = mode or profile_mode()
+    if mode is None:
+        yield None
+        return
+
+    directory = run_directory(stage)
+    profiler = None
+    if mode == "memory":
+        tracemalloc.start(TRACE_FRAMES)
+    elif mode == "cprofile":
+        profiler = ThreadProfilers()
+        profiler.enable()
+    else:
+        profiler = StackSampler(SAMPLE_INTERVAL)
+        profiler.start()
+    start = time.perf_counter()
+    try:
+        yield directory
+    finally:
+        elapsed = time.perf_counter() - start
+        if mode == "cprofile":
+            profiler.disable()
+            stats = profiler.stats()
+            stats.dump_stats(os.path.join(directory, f"{stage}.pstats"))
+            with open(os.path.join(directory, f"{stage}.top.txt"), "w", encoding="utf-8") as file:
+                stats.stream = file
+                stats.sort_stats("cumulative").print_stats(TOP_N)
+        elif mode == "sample":
+            profiler.stop()
+            profiler.write(os.path.join(directory, f"{stage}.collapsed"))
+        else:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            _write_allocations(os.path.join(directory, f"{stage}.allocations.txt"), snapshot, peak, current)
+        print(f"Profile of {stage} ({mode}, {elapsed:.1f}s) written to {directory}")
+
+
+def main():
+    """python profiling.py <script.py> [script args...]: runs the script as __main__ under profiled()."""
+    if len(sys.argv) < 2:
+        print("Usage: python profiling.py <script.py> [args...]")
+        sys.exit(2)
+    script_path = sys.argv[1]
+    stage = os.path.splitext(os.path.basename(script_path))[0]
+    sys.argv = sys.argv[1:]
+    # Same import path as `python <script>`: the script's own directory first
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script_path)))
+    with profiled(stage):
+        runpy.run_path(script_path, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
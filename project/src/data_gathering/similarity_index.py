@@ -0,0 +1,455 @@
+"""
+Local similarity index over the job postings ("postings similar to this one", "match my CV").
+
+Each posting becomes a hashed TF-IDF vector over its cleaned, translated description (boilerplate
+removed), its title and its extracted skill ids. The vectors are stored as memory-mapped NumPy arrays
+with an IVF structure for approximate nearest-neighbour search: spherical k-means centroids, one list
+assignment per posting, and queries scoring only the postings of the NPROBE closest lists.
+
+The index is updated incrementally, keyed by job_key: new postings are appended, changed ones are
+re-vectorized in place and expired ones deactivated. The centroids are retrained whenever the index has
+doubled since they were trained. Row metadata is an append-only log (rows.jsonl), so a flush writes only
+the rows it touched; writers (the build task, the streaming loader) hold an exclusive file lock.
+
+    python src/data_gathering/similarity_index.py build                 # after extract_skills (DAG task)
+    python src/data_gathering/similarity_index.py query --job-key <url> -k 10
+    python src/data_gathering/similarity_index.py query --file my_cv.txt -k 20
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import zlib
+import logging
+import argparse
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, run a single writer at a time
+    fcntl = None
+
+import metrics
+from description_trim import trim_description
+from load_jobs import prepare_records
+from skill_taxonomy import SKILL_ID_COLUMNS, SkillTaxonomy
+
+
+# ---------- CONFIG ---------- #
+INDEX_DIR = os.getenv("SIMILARITY_INDEX_DIR", "src/data_gathering/similarity_index")
+INPUT_FILE = "src/data_gathering/Dataset_Full_Parsed.csv"
+DIMENSIONS = int(os.getenv("SIMILARITY_DIMENSIONS", "512"))
+DF_BUCKETS = 2 ** 20  # document-frequency table size (token hashes modulo this)
+NPROBE = int(os.getenv("SIMILARITY_NPROBE", "8"))
+KMEANS_SAMPLE = 20000
+KMEANS_ITERATIONS = 10
+SKILL_WEIGHT = 3.0  # an extracted skill counts as much as three mentions in the text
+TITLE_WEIGHT = 2.0
+LOG_COMPACT_FACTOR = 2  # rows.jsonl is rewritten once it holds this many lines per row
+# ---------------------------- #
+
+STOPWORDS = {"a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+             "its", "of", "on", "or", "our", "that", "the", "their", "this", "to", "we", "will", "with",
+             "you", "your", "who", "what", "all", "any", "can", "not", "but", "if", "into", "more", "other"}
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+
+
+def _hash(token):
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def tokenize(text):
+    """Lower-case words (stopwords removed) and adjacent word pairs."""
+    if not isinstance(text, str):
+        return []
+    words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def posting_features(record):
+    """Weighted term counts of a posting, keyed by token hash."""
+    description = record.get("Job Description")
+    if isinstance(description, str):
+        # Boilerplate (EEO, benefits) would make every posting look alike
+        description = trim_description(description, token_budget=10 ** 6)[0]
+    features = Counter(_hash(token) for token in tokenize(description))
+    for token in tokenize(record.get("Job Title")):
+        features[_hash(token)] += TITLE_WEIGHT
+    for id_column in SKILL_ID_COLUMNS.values():
+        for skill_id in record.get(id_column) or []:
+            features[_hash(f"skill:{skill_id}")] += SKILL_WEIGHT
+    return features
+
+
+def query_features(text, taxonomy=None):
+    """Features of free text (a CV): words, pairs and the taxonomy skills it mentions."""
+    features = Counter(_hash(token) for token in tokenize(text))
+    if taxonomy is not None:
+        words = TOKEN_PATTERN.findall(text.lower())
+        for size in (1, 2, 3):
+            for start in range(len(words) - size + 1):
+                skill_id = taxonomy.resolve(" ".join(words[start:start + size]), add_missing=False)
+                if skill_id is not None:
+                    features[_hash(f"skill:{skill_id}")] += SKILL_WEIGHT
+    return features
+
+
+@contextmanager
+def index_lock(directory):
+    """Exclusive lock on an index directory, held while writing to it (not needed to query)."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "index.lock"), "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SimilarityIndex:
+    """Memory-mapped vectors, IVF lists and document frequencies stored in one directory."""
+
+    def __init__(self, directory, mode="r+"):
+        self.directory = directory
+        self.mode = mode
+        self.meta = {}
+        self.rows = []  # [job_key, content_hash, title, company, location] per row
+        self.row_of = {}
+        self.centroids = None
+        self._dirty_rows = set()
+        self._centroids_dirty = False
+        self._log_generation = None
+        self.refresh()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def refresh(self):
+        """Catches up with what other writers flushed: metadata, new log lines, centroids, grown arrays."""
+        capacity, trainings = self.meta.get("capacity"), self.meta.get("trainings")
+        with open(self._path("meta.json"), encoding="utf-8") as file:
+            self.meta = json.load(file)
+        if self.meta.get("log_generation", 0) != self._log_generation:
+            # First read, or the log was compacted: read it from the start
+            self._log_generation = self.meta.get("log_generation", 0)
+            self.rows, self.row_of = [], {}
+            self._log_offset, self._log_lines = 0, 0
+        self._read_rows_log()
+        if len(self.rows) > self.meta["count"]:
+            # Lines appended by a flush that did not get to write meta.json
+            for row in self.rows[self.meta["count"]:]:
+                self.row_of.pop(row[0], None)
+            del self.rows[self.meta["count"]:]
+        if trainings is None or self.meta.get("trainings") != trainings:
+            path = self._path("centroids.npy")
+            self.centroids = np.load(path) if os.path.exists(path) else None
+        if self.meta["capacity"] != capacity:
+            self._map_arrays()
+
+    def _read_rows_log(self):
+        """Applies the rows.jsonl lines written since the last read; a later line for a row replaces it."""
+        path = self._path("rows.jsonl")
+        if not os.path.exists(path):
+            if os.path.exists(self._path("rows.json")):  # index written before the log existed
+                with open(self._path("rows.json"), encoding="utf-8") as file:
+                    self.rows = json.load(file)
+                self.row_of = {row[0]: i for i, row in enumerate(self.rows)}
+                self._dirty_rows = set(range(len(self.rows)))
+            return
+        with open(path, "rb") as file:
+            file.seek(self._log_offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # being appended right now
+                row, *fields = json.loads(line)
+                if row < len(self.rows):
+                    self.rows[row] = fields
+                else:
+                    self.rows.append(fields)
+                self.row_of[fields[0]] = row
+                self._log_offset += len(line)
+                self._log_lines += 1
+
+    @contextmanager
+    def locked(self):
+        """Holds the directory lock and refreshes the in-memory state first: `with index.locked(): upsert, flush`."""
+        with index_lock(self.directory):
+            self.refresh()
+            yield self
+
+    @classmethod
+    def create(cls, directory, dimensions=DIMENSIONS, capacity=1024):
+        os.makedirs(directory, exist_ok=True)
+        meta = {"dimensions": dimensions, "count": 0, "capacity": capacity, "documents": 0, "trained_count": 0}
+        np.zeros(DF_BUCKETS, dtype=np.int32).tofile(os.path.join(directory, "df.i32"))
+        for name, itemsize in (("vectors.f32", 4 * dimensions), ("assignments.i32", 4), ("active.u8", 1)):
+            with open(os.path.join(directory, name), "wb") as file:
+                file.truncate(capacity * itemsize)
+        open(os.path.join(directory, "rows.jsonl"), "w").close()
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        for name in ("centroids.npy", "rows.json"):
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(os.path.join(directory, name))
+        return cls(directory)
+
+    @classmethod
+    def open_or_create(cls, directory=INDEX_DIR):
+        if os.path.exists(os.path.join(directory, "meta.json")):
+            return cls(directory)
+        return cls.create(directory)
+
+    def _map_arrays(self):
+        capacity, dimensions = self.meta["capacity"], self.meta["dimensions"]
+        self.vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode=self.mode,
+                                 shape=(capacity, dimensions))
+        self.assignments = np.memmap(self._path("assignments.i32"), dtype=np.int32, mode=self.mode, shape=(capacity,))
+        self.active = np.memmap(self._path("active.u8"), dtype=np.uint8, mode=self.mode, shape=(capacity,))
+        self.df = np.memmap(self._path("df.i32"), dtype=np.int32, mode=self.mode, shape=(DF_BUCKETS,))
+
+    def _grow(self, needed):
+        """Doubles the memory-mapped files until `needed` rows fit (new rows are zero-filled)."""
+        capacity = self.meta["capacity"]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for array in (self.vectors, self.assignments, self.active):
+            array.flush()
+        del self.vectors, self.assignments, self.active
+        for name, itemsize in (("vectors.f32", 4 * self.meta["dimensions"]), ("assignments.i32", 4), ("active.u8", 1)):
+            os.truncate(self._path(name), capacity * itemsize)
+        self.meta["capacity"] = capacity
+        self._map_arrays()
+
+    def vectorize(self, features):
+        """Signed hashing of TF-IDF weights into `dimensions` columns, L2-normalized."""
+        vector = np.zeros(self.meta["dimensions"], dtype=np.float32)
+        if not features:
+            return vector
+        hashes = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+        counts = np.fromiter(features.values(), dtype=np.float64, count=len(features))
+        buckets = hashes % DF_BUCKETS
+        idf = np.log((1 + self.meta["documents"]) / (1 + self.df[buckets])) + 1
+        signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+        np.add.at(vector, buckets % len(vector), signs * (1 + np.log(counts)) * idf)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def upsert(self, records, expire_missing=False):
+        """
+        Adds new postings, re-vectorizes changed ones (content_hash differs) and, with expire_missing,
+        deactivates the postings absent from records. records maps job_key -> record (prepare_records).
+        Returns (added, updated, expired).
+        """
+        new_keys = [key for key in records if key not in self.row_of]
+        changed = [key for key in records if key in self.row_of
+                   and self.rows[self.row_of[key]][1] != records[key]["content_hash"]]
+        reactivated = [key for key in records if key in self.row_of and not self.active[self.row_of[key]]]
+        features = {key: posting_features(records[key]) for key in dict.fromkeys(new_keys + changed + reactivated)}
+
+        # Document frequencies count every posting once (changed postings are not re-counted)
+        for key in new_keys:
+            buckets = np.unique(np.fromiter(features[key], dtype=np.int64, count=len(features[key])) % DF_BUCKETS)
+            self.df[buckets] += 1
+        self.meta["documents"] += len(new_keys)
+
+        self._grow(self.meta["count"] + len(new_keys))
+        for key in new_keys:
+            self.row_of[key] = len(self.rows)
+            self.rows.append([key, None, None, None, None])
+        for key, feature_counts in features.items():
+            row, record = self.row_of[key], records[key]
+            self.vectors[row] = self.vectorize(feature_counts)
+            self.active[row] = 1
+            self.rows[row] = [key, record["content_hash"]] + [
+                None if pd.isna(record.get(field)) else str(record.get(field))
+                for field in ("Job Title", "Company Name", "Location")]
+            self._dirty_rows.add(row)
+        self.meta["count"] = len(self.rows)
+
+        expired = []
+        if expire_missing:
+            expired = [key for key, row in self.row_of.items() if self.active[row] and key not in records]
+            self.active[[self.row_of[key] for key in expired]] = 0
+
+        if self.centroids is None or self.meta["count"] >= 2 * max(self.meta["trained_count"], 1):
+            self.train()
+        elif features:
+            rows = np.array([self.row_of[key] for key in features])
+            self.assignments[rows] = self._nearest_lists(self.vectors[rows])
+        return new_keys, [key for key in changed if key not in new_keys], expired
+
+    def _nearest_lists(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def train(self):
+        """Spherical k-means on a sample of the active postings, then reassigns every row."""
+        active_rows = np.flatnonzero(self.active[:self.meta["count"]])
+        if len(active_rows) == 0:
+            return
+        nlist = int(min(1024, max(1, math.sqrt(len(active_rows)))))
+        rng = np.random.default_rng(0)
+        sample = self.vectors[rng.choice(active_rows, size=min(KMEANS_SAMPLE, len(active_rows)), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(nlist):
+                members = sample[labels == list_id]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[list_id] = centroid / (np.linalg.norm(centroid) or 1)
+        self.centroids = centroids.astype(np.float32)
+        self._centroids_dirty = True
+        self.meta["trainings"] = self.meta.get("trainings", 0) + 1
+        for start in range(0, self.meta["count"], 50000):
+            self.assignments[start:start + 50000] = self._nearest_lists(self.vectors[start:start + 50000])
+        self.meta["trained_count"] = self.meta["count"]
+        logging.info(f"Similarity index trained: {nlist} lists over {len(active_rows)} postings")
+
+    def search(self, vector, k=10, nprobe=NPROBE, exclude_row=None):
+        """Top-k active postings by cosine similarity, scanning the nprobe closest lists."""
+        count = self.meta["count"]
+        if count == 0:
+            return []
+        if self.centroids is None or nprobe >= len(self.centroids):
+            candidates = np.flatnonzero(self.active[:count])
+        else:
+            probes = np.argpartition(-(self.centroids @ vector), nprobe)[:nprobe]
+            in_probes = np.isin(self.assignments[:count], probes)
+            candidates = np.flatnonzero(in_probes & (self.active[:count] == 1))
+        if exclude_row is not None:
+            candidates = candidates[candidates != exclude_row]
+        if len(candidates) == 0:
+            return []
+        scores = self.vectors[candidates] @ vector
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for i in top:
+            job_key, _, title, company, location = self.rows[candidates[i]]
+            results.append((float(scores[i]), job_key, title, company, location))
+        return results
+
+    def similar_to(self, job_key, k=10, nprobe=NPROBE):
+        row = self.row_of.get(job_key)
+        if row is None:
+            raise KeyError(f"{job_key} is not in the similarity index")
+        return self.search(np.array(self.vectors[row]), k=k, nprobe=nprobe, exclude_row=row)
+
+    def _write_rows(self, file, rows):
+        for row in rows:
+            line = (json.dumps([row] + self.rows[row]) + "\n").encode("utf-8")
+            file.write(line)
+            self._log_offset += len(line)
+            self._log_lines += 1
+
+    def flush(self):
+        """
+        Writes the arrays, the centroids if retrained and the rows touched since the last flush, then
+        the metadata (written last, so readers see a consistent count). Call it under locked().
+        """
+        for array in (self.vectors, self.assignments, self.active, self.df):
+            array.flush()
+        if self._centroids_dirty:
+            with open(self._path("centroids.tmp"), "wb") as file:
+                np.save(file, self.centroids)
+            os.replace(self._path("centroids.tmp"), self._path("centroids.npy"))
+            self._centroids_dirty = False
+
+        if self._log_lines + len(self._dirty_rows) > LOG_COMPACT_FACTOR * max(len(self.rows), 1000):
+            # Mostly superseded lines: rewrite one line per row
+            self._log_offset, self._log_lines = 0, 0
+            with open(self._path("rows.tmp"), "wb") as file:
+                self._write_rows(file, range(len(self.rows)))
+            os.replace(self._path("rows.tmp"), self._path("rows.jsonl"))
+            self._log_generation = self.meta["log_generation"] = self.meta.get("log_generation", 0) + 1
+        elif self._dirty_rows:
+            with open(self._path("rows.jsonl"), "ab") as file:
+                self._write_rows(file, sorted(self._dirty_rows))
+        self._dirty_rows = set()
+        if os.path.exists(self._path("rows.json")):
+            os.remove(self._path("rows.json"))
+
+        with open(self._path("meta.json.tmp"), "w", encoding="utf-8") as file:
+            json.dump(self.meta, file)
+        os.replace(self._path("meta.json.tmp"), self._path("meta.json"))
+
+
+def build(args):
+    if not os.path.isfile(args.input):
+        logging.error(f"The file '{args.input}' does not exist.")
+        sys.exit(1)
+    with metrics.stage("similarity_index") as run:
+        data = pd.read_csv(args.input, encoding="utf-8")
+        run.rows_in = len(data)
+        records = prepare_records(data, SkillTaxonomy.load())
+        # The streaming loader may be writing to the same index
+        with index_lock(args.index_dir):
+            index = SimilarityIndex.create(args.index_dir) if args.rebuild else SimilarityIndex.open_or_create(args.index_dir)
+            # The parsed dataset is the full daily scrape, so postings missing from it have expired
+            added, updated, expired = index.upsert(records, expire_missing=True)
+            index.flush()
+        run.rows_out = len(added) + len(updated)
+        logging.info(f"Similarity index: {len(added)} added, {len(updated)} updated, {len(expired)} expired "
+                     f"({index.meta['count']} rows)")
+        metrics.increment("similarity_index_added", len(added))
+        metrics.increment("similarity_index_updated", len(updated))
+        metrics.increment("similarity_index_expired", len(expired))
+    metrics.export("similarity_index")
+
+
+def query(args):
+    index = SimilarityIndex(args.index_dir, mode="r")
+    with metrics.timed("similarity_query"):
+        if args.job_key:
+            results = index.similar_to(args.job_key, k=args.k, nprobe=args.nprobe)
+        else:
+            if args.file:
+                with open(args.file, encoding="utf-8") as file:
+                    text = file.read()
+            else:
+                text = args.text
+            vector = index.vectorize(query_features(text, SkillTaxonomy.load()))
+            results = index.search(vector, k=args.k, nprobe=args.nprobe)
+    for score, job_key, title, company, location in results:
+        print(f"{score:.3f}  {title} | {company} | {location}\n       {job_key}")
+    latency = metrics.summary()["latency"]["similarity_query"]
+    print(f"{len(results)} results in {latency['sum'] * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local similarity index over the job postings.")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Add, update and expire postings from the parsed dataset")
+    build_parser.add_argument("--input", default=INPUT_FILE)
+    build_parser.add_argument("--rebuild", action="store_true", help="Drop the index and rebuild it from scratch")
+
+    query_parser = commands.add_parser("query", help="Top-k similar postings")
+    source = query_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--job-key", help="A posting's job_key (its url)")
+    source.add_argument("--text", help="Free text, e.g. a CV summary")
+    source.add_argument("--file", help="Text file, e.g. a CV")
+    query_parser.add_argument("-k", type=int, default=10)
+    query_parser.add_argument("--nprobe", type=int, default=NPROBE)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args)
+    else:
+        query(args)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
@@ -0,0 +1,153 @@
+import re
+import logging
+from datetime import datetime, timedelta
+
+import pandas as pd
+from pymongo import UpdateOne, ASCENDING
+
+from skill_taxonomy import SKILL_ID_COLUMNS, parse_skill_ids
+
+
+# ---------- CONFIG ---------- #
+SKILL_DEMAND_COLLECTION = "skillDemandAgg"
+POSTING_DATE_COLLECTION = "postingDateAgg"
+AGGREGATE_STATE_COLLECTION = "aggregateState"  # holds the 'stale' flag set when a load could not be counted
+SKILL_TYPES = {
+    "Must-have Skills": "must_have",
+    "Nice-to-have Skills": "nice_to_have",
+}
+SKILL_DEMAND_KEYS = ["skill_id", "skill_type", "province", "keyword", "experience_level"]
+POSTING_DATE_KEYS = ["posted_date", "province", "keyword"]
+MISSING_VALUES = {"", "n/a", "nan", "not specified", "none"}
+# ---------------------------- #
+
+
+def _clean_label(value):
+    """Strips whitespace and trailing periods, returns 'Not specified' for empty values."""
+    if pd.isna(value):
+        return "Not specified"
+    label = str(value).strip().rstrip(".").strip()
+    return label if label.lower() not in MISSING_VALUES else "Not specified"
+
+
+def normalize_posted_day(value, reference_date=None):
+    """Converts 'Posted Day' values ('19d', '24h', '30d+', '2025-04-02') to an ISO date string."""
+    reference_date = reference_date or datetime.now()
+    if pd.isna(value):
+        return "unknown"
+    text = str(value).strip().lower()
+
+    match = re.fullmatch(r"(\d+)\s*([dh])\+?", text)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        delta = timedelta(days=amount) if unit == "d" else timedelta(hours=amount)
+        return (reference_date - delta).strftime("%Y-%m-%d")
+
+    try:
+        return pd.to_datetime(text).strftime("%Y-%m-%d")
+    except (ValueError, TypeError):
+        return "unknown"
+
+
+def _skill_ids(doc, text_column, taxonomy):
+    """Returns the integer-coded skills of a document, encoding the display string if needed."""
+    ids = doc.get(SKILL_ID_COLUMNS[text_column])
+    if ids is None or (not isinstance(ids, (list, str)) and pd.isna(ids)):
+        return taxonomy.encode(doc.get(text_column))
+    return parse_skill_ids(ids)
+
+
+def compute_deltas(signed_docs, taxonomy):
+    """
+    Builds the count deltas for both aggregate collections.
+    signed_docs is a list of (document, sign) pairs: +1 for inserted documents,
+    -1 for expired ones, and both -1 (old) and +1 (new) for updated ones.
+    """
+    frame = pd.DataFrame({
+        "province": [_clean_label(doc.get("Provincia")) for doc, _ in signed_docs],
+        "keyword": [_clean_label(doc.get("Keyword")) for doc, _ in signed_docs],
+        "experience_level": [_clean_label(doc.get("Experience Level")) for doc, _ in signed_docs],
+        "posted_date": [doc.get("Posted Date", "unknown") for doc, _ in signed_docs],
+        "count": [sign for _, sign in signed_docs],
+    })
+    date_deltas = frame.groupby(POSTING_DATE_KEYS, as_index=False)["count"].sum()
+
+    # One row per (document, skill id), grouped as integers instead of splitting strings
+    parts = []
+    for text_column, skill_type in SKILL_TYPES.items():
+        part = frame[["province", "keyword", "experience_level", "count"]].copy()
+        part["skill_id"] = [_skill_ids(doc, text_column, taxonomy) for doc, _ in signed_docs]
+        part = part.explode("skill_id").dropna(subset=["skill_id"])
+        part["skill_type"] = skill_type
+        parts.append(part)
+    skills = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=SKILL_DEMAND_KEYS + ["count"])
+    skills["skill_id"] = skills["skill_id"].astype("int64")
+
+    # Updated documents that did not change a group cancel out here
+    skill_deltas = skills.groupby(SKILL_DEMAND_KEYS, as_index=False)["count"].sum()
+    skill_deltas = skill_deltas[skill_deltas["count"] != 0].copy()
+    skill_deltas["skill"] = [taxonomy.name_of(skill_id) for skill_id in skill_deltas["skill_id"]]
+    return skill_deltas, date_deltas[date_deltas["count"] != 0]
+
+
+def _apply_to_collection(collection, deltas, keys):
+    """Increments the aggregate rows of one collection and drops the ones that reach zero."""
+    if deltas.empty:
+        return 0
+    operations = []
+    for row in deltas.to_dict(orient="records"):
+        update = {"$inc": {"count": int(row["count"])}}
+        if "skill" in row:
+            update["$set"] = {"skill": row["skill"]}
+        operations.append(UpdateOne({key: row[key] for key in keys}, update, upsert=True))
+    result = collection.bulk_write(operations, ordered=False)
+    collection.delete_many({"count": {"$lte": 0}})
+    return result.modified_count + result.upserted_count
+
+
+def ensure_aggregate_indexes(db):
+    """Creates the unique compound indexes used by the upserts and the dashboard queries."""
+    db[SKILL_DEMAND_COLLECTION].create_index([(key, ASCENDING) for key in SKILL_DEMAND_KEYS], unique=True)
+    db[SKILL_DEMAND_COLLECTION].create_index([("province", ASCENDING), ("keyword", ASCENDING), ("count", -1)])
+    db[POSTING_DATE_COLLECTION].create_index([(key, ASCENDING) for key in POSTING_DATE_KEYS], unique=True)
+
+
+def mark_aggregates_stale(db, reason):
+    """Forces a rebuild on the next load, when the jobs collection changed without its deltas."""
+    logging.error(f"Skill aggregates marked for rebuild: {reason}")
+    db[AGGREGATE_STATE_COLLECTION].update_one({"_id": "skill_aggregates"},
+                                             {"$set": {"stale": True, "reason": reason}}, upsert=True)
+
+
+def aggregates_need_rebuild(db):
+    """True when the aggregates are empty, marked stale or were built before skills were integer-coded."""
+    collection = db[SKILL_DEMAND_COLLECTION]
+    if collection.estimated_document_count() == 0:
+        return True
+    if db[AGGREGATE_STATE_COLLECTION].count_documents({"_id": "skill_aggregates", "stale": True}, limit=1):
+        return True
+    return collection.count_documents({"skill_id": {"$exists": False}}, limit=1) > 0
+
+
+def apply_deltas(db, inserted, updated, expired, taxonomy):
+    """
+    Updates the materialized aggregates from one load.
+    inserted and expired are lists of documents, updated is a list of (old, new) pairs.
+    """
+    signed_docs = [(doc, 1) for doc in inserted] + [(doc, -1) for doc in expired]
+    for old_doc, new_doc in updated:
+        signed_docs.extend([(old_doc, -1), (new_doc, 1)])
+
+    skill_deltas, date_deltas = compute_deltas(signed_docs, taxonomy)
+    skill_rows = _apply_to_collection(db[SKILL_DEMAND_COLLECTION], skill_deltas, SKILL_DEMAND_KEYS)
+    date_rows = _apply_to_collection(db[POSTING_DATE_COLLECTION], date_deltas, POSTING_DATE_KEYS)
+    logging.info(f"Aggregates refreshed: {skill_rows} skill demand rows, {date_rows} posting date rows touched.")
+
+
+def rebuild_aggregates(db, collection, taxonomy):
+    """Recomputes both aggregate collections from scratch (first run or after a schema change)."""
+    db[SKILL_DEMAND_COLLECTION].drop()
+    db[POSTING_DATE_COLLECTION].drop()
+    ensure_aggregate_indexes(db)
+    apply_deltas(db, list(collection.find({}, {"_id": 0})), [], [], taxonomy)
+    db[AGGREGATE_STATE_COLLECTION].delete_one({"_id": "skill_aggregates"})
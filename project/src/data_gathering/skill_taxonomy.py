@@ -0,0 +1,186 @@
+import os
+import re
+import json
+import logging
+import unicodedata
+
+import pandas as pd
+
+
+# ---------- CONFIG ---------- #
+TAXONOMY_PATH = "src/data_gathering/skill_taxonomy.json"  # curated, edited by hand only
+# Skills registered by the pipeline from LLM output, kept out of the curated file until reviewed
+ADDED_SKILLS_PATH = os.getenv("SKILL_TAXONOMY_RUNTIME_PATH", "src/data_gathering/skill_taxonomy_added.json")
+# Auto-added skills get ids from this value up, curated skills stay below it, so neither can take the other's ids
+AUTO_ID_START = 1_000_000
+SKILL_ID_COLUMNS = {
+    "Must-have Skills": "Must-have Skill Ids",
+    "Nice-to-have Skills": "Nice-to-have Skill Ids",
+}
+TAXONOMY_VERSION_COLUMN = "Skill Taxonomy Version"
+MISSING_VALUES = {"", "n/a", "nan", "not specified", "none"}
+# Generic words the LLM appends to a skill name ("Python programming", "SQL skills")
+GENERIC_SUFFIXES = ("programming language", "programming", "language", "skills", "skill",
+                    "experience", "knowledge", "proficiency", "expertise")
+# Words that end in 's' but are not plurals
+SINGULAR_EXCEPTIONS = {"kubernetes", "pandas", "aws", "gis", "sas", "devops", "mlops", "analytics",
+                       "statistics", "physics", "economics", "mathematics", "sales", "series", "ops",
+                       "windows"}
+# Plurals of words ending in -sse, -xe, -che or -she ('caches'): only the 's' is dropped
+ES_PLURAL_EXCEPTIONS = {"caches", "niches", "apaches", "avalanches"}
+# ---------------------------- #
+
+
+def normalize_skill(text):
+    """
+    Reduces a raw skill string to its lookup key: lower case, no accents or stray punctuation,
+    no trailing version numbers ('python3', 'Python 3.10'), no generic suffixes and singular form.
+    """
+    if pd.isna(text):
+        return ""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").lower()
+    text = re.sub(r"\(.*?\)", " ", text)               # drop parenthesised details
+    text = re.sub(r"[^a-z0-9+#./\- ]", " ", text)      # keep c++, c#, .net, node.js, ci/cd
+    text = re.sub(r"\s+", " ", text).strip(" -/").rstrip(".")
+
+    for suffix in GENERIC_SUFFIXES:
+        if text.endswith(" " + suffix):
+            text = text[: -len(suffix)].strip()
+            break
+
+    # 'Python 3.10', 'Angular v15' and 'python3', but not 'DDR4' or 'PCIe Gen4'
+    text = re.sub(r"(\s+v?\d+(\.\d+)*(\.x)?|(?<=[a-z]{4})\d)$", "", text)
+
+    words = text.split(" ")
+    last = words[-1]
+    if last not in SINGULAR_EXCEPTIONS and len(last) > 4 and not last.endswith(("ss", "us", "is", "as", "os", "ics", "js")):
+        if last.endswith("ies"):
+            words[-1] = last[:-3] + "y"
+        elif last.endswith(("sses", "xes", "ches", "shes")) and last not in ES_PLURAL_EXCEPTIONS:
+            words[-1] = last[:-2]  # 'processes', 'indexes', 'matches'
+        elif last.endswith("s"):
+            words[-1] = last[:-1]
+    return " ".join(words).strip()
+
+
+def parse_skill_ids(value):
+    """Reads an integer-coded skill array back from its CSV (JSON) representation."""
+    if isinstance(value, list):
+        return [int(skill_id) for skill_id in value]
+    if pd.isna(value) or not str(value).strip():
+        return []
+    return [int(skill_id) for skill_id in json.loads(value)]
+
+
+class SkillTaxonomy:
+    """
+    Canonical skills with their synonyms, versioned on disk as JSON. Ids are never reused.
+    The curated skills come from `path`; skills the pipeline registers on its own are marked
+    "reviewed": false, numbered from AUTO_ID_START and saved to `added_path`, never to the curated file.
+    A reviewed skill is promoted by moving it to the curated file with the same id and its name kept as
+    the name or a synonym.
+    """
+
+    def __init__(self, skills, version=1, path=TAXONOMY_PATH, added_path=ADDED_SKILLS_PATH):
+        self.path = path
+        self.added_path = added_path
+        self.version = version
+        self.skills = skills  # list of {"id", "name", "synonyms"} (+ "reviewed": false when auto-added)
+        self.dirty = False
+        self.index = {}
+        ids = [skill["id"] for skill in skills]
+        if len(ids) != len(set(ids)):
+            raise ValueError(f"Skill taxonomy {path} uses the same id for several skills")
+        for skill in skills:
+            for alias in [skill["name"]] + skill.get("synonyms", []):
+                self.index.setdefault(normalize_skill(alias), skill["id"])
+        self.names = {skill["id"]: skill["name"] for skill in skills}
+
+    @classmethod
+    def load(cls, path=TAXONOMY_PATH, added_path=ADDED_SKILLS_PATH):
+        if not os.path.exists(path):
+            logging.warning(f"Skill taxonomy not found at {path}, starting an empty one.")
+            skills, version = [], 0
+        else:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            skills, version = data["skills"], data["version"]
+
+        if added_path and os.path.exists(added_path):
+            with open(added_path, "r", encoding="utf-8") as file:
+                added = json.load(file)
+            curated = {skill["id"]: {normalize_skill(alias) for alias in [skill["name"]] + skill.get("synonyms", [])}
+                       for skill in skills}
+            for skill in added["skills"]:
+                if skill["id"] < AUTO_ID_START:
+                    raise ValueError(f"Added skill '{skill['name']}' in {added_path} has id {skill['id']}, "
+                                     f"below the auto-added range ({AUTO_ID_START}+)")
+                if skill["id"] in curated:
+                    # Stored documents already use this id for the added skill: only a promotion may reuse it
+                    if normalize_skill(skill["name"]) not in curated[skill["id"]]:
+                        raise ValueError(f"Skill id {skill['id']} is '{skill['name']}' in {added_path} but a different "
+                                         f"skill in {path}; give the curated skill an id below {AUTO_ID_START}")
+                    continue  # promoted
+                skills.append(dict(skill, reviewed=False))
+            version = max(version, added["version"])
+        return cls(skills, version=version, path=path, added_path=added_path)
+
+    def save(self):
+        """Writes the unreviewed skills to added_path with a new version number if new skills were added."""
+        if not self.dirty:
+            return
+        self.version += 1
+        added = [skill for skill in self.skills if skill.get("reviewed", True) is False]
+        tmp_path = f"{self.added_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": self.version, "skills": added}, file, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.added_path)
+        self.dirty = False
+        logging.info(f"Skill taxonomy v{self.version} saved with {len(added)} unreviewed skills: {self.added_path}")
+
+    def resolve(self, raw_skill, add_missing=True):
+        """Returns the canonical id of a raw skill string, registering it as a new skill if unknown."""
+        key = normalize_skill(raw_skill)
+        if not key or key in MISSING_VALUES:
+            return None
+        skill_id = self.index.get(key)
+        if skill_id is None and add_missing:
+            skill_id = max([i for i in self.names if i >= AUTO_ID_START], default=AUTO_ID_START - 1) + 1
+            self.skills.append({"id": skill_id, "name": str(raw_skill).strip().rstrip("."), "synonyms": [],
+                                "reviewed": False})
+            self.index[key] = skill_id
+            self.names[skill_id] = self.skills[-1]["name"]
+            self.dirty = True
+        return skill_id
+
+    def encode(self, skills_text, add_missing=True):
+        """Maps a comma-separated skill string to a sorted, de-duplicated list of skill ids."""
+        if pd.isna(skills_text):
+            return []
+        ids = {self.resolve(skill, add_missing) for skill in str(skills_text).split(",")}
+        ids.discard(None)
+        return sorted(ids)
+
+    def encode_column(self, series):
+        """Encodes a whole column, resolving each distinct skill string only once."""
+        cache = {}
+        encoded = []
+        for value in series:
+            key = value if isinstance(value, str) else None
+            if key not in cache:
+                cache[key] = json.dumps(self.encode(value))
+            encoded.append(cache[key])
+        return encoded
+
+    def name_of(self, skill_id):
+        return self.names.get(int(skill_id), "Unknown")
+
+
+def add_skill_id_columns(df, taxonomy):
+    """Adds the integer-coded skill arrays next to the display strings and saves any new skills."""
+    for text_column, id_column in SKILL_ID_COLUMNS.items():
+        if text_column in df.columns:
+            df[id_column] = taxonomy.encode_column(df[text_column])
+    taxonomy.save()
+    df[TAXONOMY_VERSION_COLUMN] = taxonomy.version
+    return df
@@ -0,0 +1,371 @@
+"""
+Streaming mode of the job pipeline.
+
+Instead of running every stage over the whole dataset (scrape >> clean >> translate >> extract >> load),
+each scraped posting flows through bounded queues into per-stage worker threads:
+
+    [glassdoor, jobspy] -> clean -> translate -> extract -> load (MongoDB)
+
+A full queue blocks its producer (backpressure) so a slow stage, usually the LLM, throttles the
+scrapers instead of buffering the whole run in memory. Worker counts and queue sizes come from the
+environment (see CONFIG). The parsed dataset CSV is still written at the end, as in batch mode.
+"""
+
+import os
+import sys
+import time
+import queue
+import logging
+import importlib.util
+import threading
+
+import pandas as pd
+import pymongo
+from dotenv import load_dotenv, find_dotenv
+
+import metrics
+import JobSpy
+import GlassdoorDataGathering
+from conc_clean import clean_record
+from trans import detect_and_translate, translator_endpoint
+from glassdoor_archive import CaptureWriter
+from description_trim import TOKEN_BUDGET, trim_description
+from load_jobs import make_job_key, prepare_records, sync_jobs
+from skill_taxonomy import SkillTaxonomy
+from similarity_index import INDEX_DIR, SimilarityIndex, index_lock
+from throttle import REQUEUE_MAX_WAIT, REQUEUE_PASSES, CircuitOpenError, get_endpoint, requeue_delay
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s')
+
+# The extraction script has dashes in its name, so it is loaded by path
+_spec = importlib.util.spec_from_file_location(
+    "job_description_skill_extract",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "job-description-skill-extract.py"),
+)
+skill_extract = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(skill_extract)
+
+# ---------- CONFIG ---------- #
+QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "50"))
+CLEAN_WORKERS = int(os.getenv("STREAM_CLEAN_WORKERS", "1"))
+TRANSLATE_WORKERS = int(os.getenv("STREAM_TRANSLATE_WORKERS", "4"))
+EXTRACT_WORKERS = int(os.getenv("STREAM_EXTRACT_WORKERS", "2"))
+LOAD_BATCH_SIZE = int(os.getenv("STREAM_LOAD_BATCH_SIZE", "25"))
+LOAD_FLUSH_SECONDS = float(os.getenv("STREAM_LOAD_FLUSH_SECONDS", "30"))
+SOURCES = os.getenv("STREAM_SOURCES", "glassdoor,jobspy").split(",")
+OUTPUT_FILE = "src/data_gathering/Dataset_Full_Parsed.csv"
+EXTRACTED_COLUMNS = ["Must-have Skills", "Nice-to-have Skills", "Experience Level", "Type of Contract", "Education level"]
+# ---------------------------- #
+
+STOP = object()  # end-of-stream marker
+
+
+class Stage:
+    """A pool of worker threads reading from inbox, applying func and writing results to outbox."""
+
+    def __init__(self, name, func, inbox, outbox, workers, endpoint=None, tick=None):
+        self.name = name
+        self.func = func
+        self.tick = tick  # called about once a second while the inbox is empty (time-based flushes)
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = workers
+        self.endpoint = endpoint  # throttled endpoint behind func, if any: retries wait for its circuit
+        self.processed = 0
+        self.failed = 0
+        self.requeued = 0
+        self._attempts = {}  # id(record) -> (failed attempts, time of the first failure), while a retry is pending
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _requeue(self, item, error):
+        """
+        Puts a failed record back into the inbox after a pause, up to REQUEUE_PASSES attempts.
+        Calls rejected by an open circuit do not count as attempts; the record waits for the circuit
+        instead, up to REQUEUE_MAX_WAIT seconds after its first failure.
+        """
+        with self._lock:
+            attempts, first_failed = self._attempts.get(id(item), (0, time.monotonic()))
+            if not isinstance(error, CircuitOpenError):
+                attempts += 1
+            if attempts >= REQUEUE_PASSES or time.monotonic() - first_failed >= REQUEUE_MAX_WAIT:
+                self._attempts.pop(id(item), None)
+                self.failed += 1
+                logging.error(f"[{self.name}] Dropping record after {attempts} attempts: {error}")
+                return
+            self._attempts[id(item)] = (attempts, first_failed)
+            self.requeued += 1
+        delay = requeue_delay(self.endpoint)
+        logging.warning(f"[{self.name}] Re-queuing record in {delay:.0f}s after error: {error}")
+        timer = threading.Timer(delay, self.inbox.put, args=(item,))
+        timer.daemon = True
+        timer.start()
+
+    def _work(self):
+        while True:
+            try:
+                item = self.inbox.get(timeout=None if self.tick is None else 1)
+            except queue.Empty:
+                try:
+                    self.tick()
+                except Exception as e:
+                    # The worker must survive, or the upstream stages block on a full queue
+                    logging.error(f"[{self.name}] Periodic flush failed, retrying on the next tick: {e}")
+                continue
+            if item is STOP:
+                self.inbox.put(STOP)  # let the sibling workers see it too
+                with self._lock:
+                    retries_pending = bool(self._attempts)
+                if retries_pending:
+                    time.sleep(1)  # re-queued records still have to come back
+                    continue
+                return
+            try:
+                with metrics.timed("stream_stage", stage=self.name):
+                    result = self.func(item)
+            except Exception as e:
+                self._requeue(item, e)
+                continue
+            with self._lock:
+                self._attempts.pop(id(item), None)
+                self.processed += 1
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result)  # blocks while the next stage is behind
+
+    def _close(self):
+        for thread in self._threads:
+            thread.join()
+        logging.info(f"[{self.name}] finished: {self.processed} processed, {self.requeued} re-queued, "
+                     f"{self.failed} failed")
+        metrics.increment("stream_processed", self.processed, stage=self.name)
+        metrics.increment("stream_requeued", self.requeued, stage=self.name)
+        metrics.increment("stream_failed", self.failed, stage=self.name)
+        if self.outbox is not None:
+            self.outbox.put(STOP)
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        closer = threading.Thread(target=self._close, name=f"{self.name}-closer", daemon=True)
+        closer.start()
+        return closer
+
+
+def produce_jobspy(outbox, keywords, locations):
+    """Scrapes every keyword/location pair and streams the rows as soon as each search returns."""
+    for keyword in keywords:
+        for location in locations:
+            try:
+                jobs = JobSpy.scrape_keyword_location(keyword, location)
+            except Exception as e:
+                logging.error(f"[jobspy] {keyword} in {location} failed: {e}")
+                continue
+            for record in JobSpy.select_output_columns(jobs).to_dict(orient="records"):
+                outbox.put(record)
+
+
+def produce_glassdoor(outbox, keywords, locations):
+    """Runs the Selenium scraper and streams each job card as soon as it has been read."""
+    driver = GlassdoorDataGathering.create_driver()
+    capture = CaptureWriter.for_run()  # None unless GLASSDOOR_CAPTURE_DIR is set
+    try:
+        GlassdoorDataGathering.login_to_glassdoor(
+            driver, GlassdoorDataGathering.GLASSDOOR_EMAIL, GlassdoorDataGathering.GLASSDOOR_PASSWORD)
+        GlassdoorDataGathering.navigate_to_jobs(driver)
+        for keyword in keywords:
+            for location in locations:
+                try:
+                    get_endpoint("glassdoor").call(GlassdoorDataGathering.search_jobs, driver, keyword, location)
+                except Exception as e:
+                    logging.error(f"[glassdoor] Skipping {keyword} in {location}: {e}")
+                    continue
+                GlassdoorDataGathering.scrape_job_listings(driver, keyword, location, on_job=outbox.put,
+                                                           capture=capture)
+    finally:
+        if capture is not None:
+            capture.close()
+        driver.quit()
+
+
+def start_sources(outbox):
+    """Starts one producer thread per source and a closer that ends the stream when all are done."""
+    keywords = JobSpy.load_list_from_file(JobSpy.KEYWORDS_PATH)
+    locations = JobSpy.load_list_from_file(JobSpy.LOCATIONS_PATH)
+    producers = {"jobspy": produce_jobspy, "glassdoor": produce_glassdoor}
+
+    threads = []
+    for source in SOURCES:
+        source = source.strip()
+        if source not in producers:
+            logging.warning(f"Unknown streaming source '{source}', skipping.")
+            continue
+        thread = threading.Thread(target=producers[source], args=(outbox, keywords, locations),
+                                  name=f"source-{source}", daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    def close():
+        for thread in threads:
+            thread.join()
+        outbox.put(STOP)
+
+    closer = threading.Thread(target=close, name="sources-closer", daemon=True)
+    closer.start()
+    return closer
+
+
+def make_clean(seen_keys, lock):
+    def clean(record):
+        record = clean_record(record)
+        key = make_job_key(record)
+        with lock:
+            if key in seen_keys:
+                return None  # duplicate across sources or searches
+            seen_keys.add(key)
+        return record
+    return clean
+
+
+def translate(record):
+    record["Job Description"] = detect_and_translate(record.get("Job Description"))
+    return record
+
+
+def extract(record):
+    trimmed, tokens_before, tokens_after = trim_description(record.get("Job Description"), TOKEN_BUDGET)
+    logging.info(f"[extract] {tokens_before} -> {tokens_after} tokens ({tokens_before - tokens_after} saved)")
+    record.update(zip(EXTRACTED_COLUMNS, skill_extract.process_job_description(trimmed)))
+    return record
+
+
+class Loader:
+    """
+    Single consumer that upserts records into MongoDB and the similarity index in small batches.
+    When a batch fails, its records are loaded one by one; the ones still failing are retried with the
+    next flush, up to REQUEUE_PASSES attempts, then dropped.
+    """
+
+    def __init__(self, db, collection, taxonomy, index):
+        self.db = db
+        self.collection = collection
+        self.taxonomy = taxonomy
+        self.index = index
+        self.batch = []
+        self.retry = []  # records that failed on their own, loaded again with the next flush
+        self.loaded = []
+        self.failed = 0
+        self._attempts = {}  # id(record) -> failed attempts
+        self.batch_started = time.time()
+
+    def __call__(self, record):
+        if not self.batch and not self.retry:
+            self.batch_started = time.time()
+        self.batch.append(record)
+        if len(self.batch) >= LOAD_BATCH_SIZE:
+            self.flush()
+        else:
+            self.tick()
+
+    def tick(self):
+        """Flushes a partial batch (or pending retries) once it is LOAD_FLUSH_SECONDS old, even if no record arrives."""
+        if (self.batch or self.retry) and time.time() - self.batch_started >= LOAD_FLUSH_SECONDS:
+            self.flush()
+
+    def _load(self, batch):
+        # Taxonomy ids are assigned here, in the single loader thread
+        records = prepare_records(pd.DataFrame(batch), self.taxonomy)
+        # A stream only sees new postings, so nothing is expired here
+        sync_jobs(self.db, self.collection, records, self.taxonomy, expire_missing=False)
+        self.taxonomy.save()
+        with self.index.locked():  # the build_similarity_index task may be writing too
+            self.index.upsert(records)
+            self.index.flush()
+        self.loaded.extend(records.values())
+        for record in batch:
+            self._attempts.pop(id(record), None)
+
+    def flush(self):
+        # The batch is taken out first, so a failing record never stays in self.batch
+        batch, self.batch, self.retry = self.batch + self.retry, [], []
+        if not batch:
+            return
+        try:
+            self._load(batch)
+            logging.info(f"[load] {len(batch)} records loaded ({len(self.loaded)} total)")
+            return
+        except Exception as e:
+            logging.warning(f"[load] Batch of {len(batch)} records failed ({e}), loading them one by one")
+        for record in batch:
+            try:
+                self._load([record])
+            except Exception as e:
+                attempts = self._attempts.get(id(record), 0) + 1
+                if attempts >= REQUEUE_PASSES:
+                    self._attempts.pop(id(record), None)
+                    self.failed += 1
+                    logging.error(f"[load] Dropping record {record.get('job url')} after {attempts} attempts: {e}")
+                else:
+                    self._attempts[id(record)] = attempts
+                    self.retry.append(record)
+        self.batch_started = time.time()  # pending retries wait one flush interval
+        logging.info(f"[load] {len(self.retry)} records kept for the next flush ({len(self.loaded)} loaded in total)")
+
+    def drain(self):
+        """Final flushes at the end of the stream, until every record is loaded or dropped."""
+        self.flush()
+        while self.retry:
+            time.sleep(LOAD_FLUSH_SECONDS)
+            self.flush()
+        metrics.increment("stream_failed", self.failed, stage="load")
+
+
+def run_pipeline(db, collection):
+    raw_q = queue.Queue(maxsize=QUEUE_SIZE)
+    clean_q = queue.Queue(maxsize=QUEUE_SIZE)
+    translated_q = queue.Queue(maxsize=QUEUE_SIZE)
+    extracted_q = queue.Queue(maxsize=QUEUE_SIZE)
+
+    with index_lock(INDEX_DIR):
+        index = SimilarityIndex.open_or_create()
+    loader = Loader(db, collection, SkillTaxonomy.load(), index)
+    stages = [
+        Stage("clean", make_clean(set(), threading.Lock()), raw_q, clean_q, CLEAN_WORKERS),
+        Stage("translate", translate, clean_q, translated_q, TRANSLATE_WORKERS, translator_endpoint),
+        Stage("extract", extract, translated_q, extracted_q, EXTRACT_WORKERS, skill_extract.llm_endpoint),
+        Stage("load", loader, extracted_q, None, 1, tick=loader.tick),
+    ]
+    closers = [stage.start() for stage in stages]
+    start_sources(raw_q).join()
+    for closer in closers:
+        closer.join()
+    loader.drain()
+    return loader.loaded
+
+
+def main():
+    load_dotenv(find_dotenv())
+    connection_string = os.environ.get("url")
+    if not connection_string:
+        logging.error("MongoDB connection string is missing. Set the 'url' environment variable.")
+        sys.exit(1)
+
+    with pymongo.MongoClient(connection_string, serverSelectionTimeoutMS=5000) as client:
+        client.admin.command("ping")
+        db = client.jobsDB
+        collection = db.jobsCollectionTest
+        collection.create_index("job_key", unique=True)
+        with metrics.stage("stream_pipeline") as run:
+            loaded = run_pipeline(db, collection)
+            run.rows_out = len(loaded)
+
+    if loaded:
+        pd.DataFrame(loaded).to_csv(OUTPUT_FILE, index=False, encoding="utf-8")
+        logging.info(f"Streamed dataset saved to: {OUTPUT_FILE}")
+    metrics.export("stream_pipeline")
+
+
+if __name__ == "__main__":
+    main()
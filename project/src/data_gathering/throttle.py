@@ -0,0 +1,248 @@
+"""
+Shared throttling for external calls (JobSpy, Glassdoor, Google Translate, Ollama).
+
+Each endpoint combines:
+  - a token bucket limiting the request rate,
+  - an AIMD concurrency limit: +1 slot per window of fast successes, halved on errors or slow calls,
+  - retries with exponential backoff and jitter,
+  - a circuit breaker that fails fast after repeated errors until a cooldown has passed.
+
+Defaults live in ENDPOINT_DEFAULTS and can be overridden per endpoint with environment variables,
+e.g. THROTTLE_OLLAMA_RATE=2 or THROTTLE_GOOGLE_TRANSLATE_MAX_CONCURRENCY=4.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+
+# ---------- CONFIG ---------- #
+ENDPOINT_DEFAULTS = {
+    # rate: requests/second, burst: bucket size, target_latency: seconds above which a call counts as slow
+    "jobspy": dict(rate=0.2, burst=1, initial_concurrency=1, max_concurrency=2, target_latency=120,
+                   retries=3, backoff=10, failure_threshold=3, cooldown=300),
+    "glassdoor": dict(rate=0.2, burst=1, initial_concurrency=1, max_concurrency=1, target_latency=60,
+                      retries=2, backoff=10, failure_threshold=3, cooldown=300),
+    "google_translate": dict(rate=5, burst=5, initial_concurrency=2, max_concurrency=8, target_latency=5,
+                             retries=4, backoff=2, failure_threshold=10, cooldown=60),
+    "ollama": dict(rate=20, burst=5, initial_concurrency=1, max_concurrency=4, target_latency=60,
+                   retries=3, backoff=5, failure_threshold=5, cooldown=120),
+}
+REQUEUE_PASSES = int(os.getenv("THROTTLE_REQUEUE_PASSES", "3"))
+REQUEUE_PAUSE = float(os.getenv("THROTTLE_REQUEUE_PAUSE", "30"))
+# Total time items may wait for an open circuit to close before they are reported as failed
+REQUEUE_MAX_WAIT = float(os.getenv("THROTTLE_REQUEUE_MAX_WAIT", "1800"))
+# ---------------------------- #
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the endpoint while its circuit breaker is open."""
+
+
+class RetriesExhaustedError(Exception):
+    """Raised when every attempt of a call failed; the last error is kept as __cause__."""
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, cooldown):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def before_call(self, name):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.cooldown:
+                raise CircuitOpenError(f"{name}: circuit open after {self.failures} consecutive failures")
+            # Half-open: let calls through again, one more failure re-opens the circuit
+            self.opened_at = None
+            self.failures = self.failure_threshold - 1
+
+    def reopens_in(self):
+        """Seconds until an open circuit lets calls through again (0 when closed)."""
+        with self.lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def record(self, ok):
+        """Returns True when this failure opened the circuit."""
+        with self.lock:
+            if ok:
+                self.failures = 0
+                return False
+            self.failures += 1
+            if self.failures >= self.failure_threshold and self.opened_at is None:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class Endpoint:
+    """Rate limit, adaptive concurrency, retries and circuit breaker for one external service."""
+
+    def __init__(self, name, rate, burst, initial_concurrency, max_concurrency, target_latency,
+                 retries, backoff, failure_threshold, cooldown):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.limit = float(initial_concurrency)
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.retries = retries
+        self.backoff = backoff
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.stats = {"calls": 0, "errors": 0, "retries": 0, "slow": 0, "circuit_opened": 0}
+
+    def _acquire_slot(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def _release_slot(self, latency, ok):
+        with self.condition:
+            self.in_flight -= 1
+            self.stats["calls"] += 1
+            if not ok:
+                self.stats["errors"] += 1
+            elif latency > self.target_latency:
+                self.stats["slow"] += 1
+            if ok and latency <= self.target_latency:
+                # Additive increase: about one extra slot per 'limit' fast calls
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            else:
+                # Multiplicative decrease on errors and slow calls
+                self.limit = max(1.0, self.limit / 2)
+            self.condition.notify_all()
+
+    def call(self, func, *args, **kwargs):
+        last_error = None
+        for attempt in range(self.retries + 1):
+            self.breaker.before_call(self.name)
+            self.bucket.acquire()
+            self._acquire_slot()
+            start = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                metrics.observe("external_call", time.monotonic() - start, endpoint=self.name)
+                metrics.increment("external_call_errors", endpoint=self.name)
+                self._release_slot(time.monotonic() - start, ok=False)
+                opened = self.breaker.record(ok=False)
+                with self.condition:
+                    self.stats["circuit_opened"] += int(opened)
+                    self.stats["retries"] += int(attempt < self.retries)
+                if opened:
+                    logging.error(f"[{self.name}] circuit opened for {self.breaker.cooldown}s after error: {e}")
+                last_error = e
+                if attempt < self.retries:
+                    delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                    logging.warning(f"[{self.name}] attempt {attempt + 1} failed ({e}), retrying in {delay:.1f}s "
+                                    f"(concurrency limit {int(self.limit)})")
+                    time.sleep(delay)
+                continue
+            metrics.observe("external_call", time.monotonic() - start, endpoint=self.name)
+            self._release_slot(time.monotonic() - start, ok=True)
+            self.breaker.record(ok=True)
+            return result
+        raise RetriesExhaustedError(f"{self.name}: {self.retries + 1} attempts failed") from last_error
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+
+def get_endpoint(name):
+    """Returns the process-wide Endpoint for name, created from ENDPOINT_DEFAULTS and env overrides."""
+    with _endpoints_lock:
+        if name not in _endpoints:
+            settings = dict(ENDPOINT_DEFAULTS[name])
+            for key, default in settings.items():
+                override = os.getenv(f"THROTTLE_{name.upper()}_{key.upper()}")
+                if override is not None:
+                    settings[key] = type(default)(float(override))
+            _endpoints[name] = Endpoint(name, **settings)
+        return _endpoints[name]
+
+
+def requeue_delay(endpoint=None, pause=REQUEUE_PAUSE):
+    """Pause before failed items are retried: at least until the endpoint's circuit lets calls through."""
+    return max(pause, endpoint.breaker.reopens_in() if endpoint is not None else 0.0)
+
+
+def process_with_requeue(items, func, workers=1, passes=REQUEUE_PASSES, pause=REQUEUE_PAUSE, endpoint=None,
+                         max_wait=REQUEUE_MAX_WAIT):
+    """
+    Applies func to every value of the items dict, running up to `workers` calls at once.
+    Items whose call fails are re-queued for another pass instead of being replaced by a default value.
+    Passes are `pause` seconds apart, or longer while the endpoint's circuit is open. A pass in which
+    every failure was a CircuitOpenError (no call reached the service) does not count against `passes`,
+    up to `max_wait` seconds of waiting in total.
+    Returns (results, failures): dicts keyed like items, failures holding the last exception.
+    """
+    results, failures = {}, {}
+    pending = list(items)
+    pass_number, waited = 0, 0.0
+    while pending:
+        def run(key):
+            try:
+                return key, func(items[key]), None
+            except Exception as e:
+                return key, None, e
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            outcomes = list(executor.map(run, pending))
+
+        failures = {}
+        for key, result, error in outcomes:
+            if error is None:
+                results[key] = result
+            else:
+                failures[key] = error
+        if not failures:
+            break
+        if not all(isinstance(error, CircuitOpenError) for error in failures.values()):
+            pass_number += 1
+        if pass_number >= passes or waited >= max_wait:
+            break
+        pending = list(failures)
+        delay = requeue_delay(endpoint, pause)
+        logging.warning(f"{len(failures)} items failed in pass {pass_number}/{passes}, re-queued in {delay:.0f}s.")
+        time.sleep(delay)
+        waited += delay
+
+    for key, error in failures.items():
+        logging.error(f"Item {key} failed after {pass_number} passes: {error}")
+    return results, failures
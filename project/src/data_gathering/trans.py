@@ -1,3 +1,7 @@
+import os
+import threading
+from collections import OrderedDict
+
 import pandas as pd
 from langdetect import detect
 from deep_translator import GoogleTranslator
@@ -5,36 +9,112 @@ from deep_translator import GoogleTranslator
 from nltk.tokenize import sent_tokenize
 import nltk
 
-# Sample DataFrame
-try:
-    df = pd.read_csv('src/data_gathering/Jobs-Data_Cleaned.csv')
-    print("Data loaded successfully.")
-except FileNotFoundError:
-    print("Error: File 'Jobs-Data_Cleaned.csv' not found.")
-    exit()
+import metrics
+from throttle import get_endpoint, process_with_requeue
+
+INPUT_FILE = 'src/data_gathering/Jobs-Data_Cleaned.csv'
+OUTPUT_FILE = 'src/data_gathering/Dataset_Full.csv'
+TRANSLATION_CACHE_SIZE = int(os.getenv('TRANSLATION_CACHE_SIZE', '20000'))  # sentences
+
+translator_endpoint = get_endpoint("google_translate")
+
+
+class TranslationCache:
+    """French sentence -> English, least recently used first out. Shared by the translation workers."""
+
+    def __init__(self, max_size=TRANSLATION_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sentence):
+        with self._lock:
+            translated = self._entries.get(sentence)
+            if translated is not None:
+                self._entries.move_to_end(sentence)
+            return translated
+
+    def put(self, sentence, translated):
+        with self._lock:
+            self._entries[sentence] = translated
+            self._entries.move_to_end(sentence)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+translation_cache = TranslationCache()  # boilerplate sentences repeat across postings
+
+
+def translate_sentence(sentence):
+    translated = translation_cache.get(sentence)
+    metrics.cache_access("translation", hit=translated is not None)
+    if translated is None:
+        translator = GoogleTranslator(source="fr", target="en")
+        translated = translator_endpoint.call(translator.translate, sentence)
+        translation_cache.put(sentence, translated)
+    return translated
 
 
 # Function to detect language and translate if needed
+# Translator errors are raised (after the endpoint's retries) so the row can be re-queued
+# Line breaks are kept, the trimming step before the LLM reads section headings
 def detect_and_translate(text):
-    try:
-        sentences = sent_tokenize(text)  # Split text into sentences
+    if not isinstance(text, str) or not text.strip():
+        return text
+
+    translated_lines = []
+    for line in text.split("\n"):
+        sentences = sent_tokenize(line)  # Split each line into sentences
         translated_sentences = []
 
         for sentence in sentences:
-            lang = detect(sentence)  # Detect language of each sentence
+            try:
+                lang = detect(sentence)  # Detect language of each sentence
+            except Exception:
+                lang = None  # No detectable language (numbers, symbols): keep the sentence as is
             if lang == "fr":  # Translate only if it's in French
-                translated_sentence = GoogleTranslator(source="fr", target="en").translate(sentence)
-                translated_sentences.append(translated_sentence)
+                translated_sentences.append(translate_sentence(sentence))
             else:
                 translated_sentences.append(sentence)  # Keep English sentences
 
-        return " ".join(translated_sentences)  # Reconstruct text
+        translated_lines.append(" ".join(translated_sentences))
+
+    return "\n".join(translated_lines)  # Reconstruct text
+
+
+def main():
+    # Sample DataFrame
+    try:
+        df = pd.read_csv(INPUT_FILE)
+        print("Data loaded successfully.")
+    except FileNotFoundError:
+        print("Error: File 'Jobs-Data_Cleaned.csv' not found.")
+        exit()
 
-    except Exception as e:
-        return text  # Return original text if there's an error
+    with metrics.stage("translate_jobs") as run:
+        run.rows_in = len(df)
+        # Apply function to the column, failed rows are re-queued for later passes
+        descriptions = df["Job Description"].to_dict()
+        translated, failures = process_with_requeue(
+            descriptions, detect_and_translate, workers=translator_endpoint.max_concurrency,
+            endpoint=translator_endpoint)
+        if failures:
+            print(f"Warning: {len(failures)} descriptions could not be translated and keep their original text.")
+        df["Job Description"] = [translated.get(index, text) for index, text in descriptions.items()]
+        print(f"Translator stats: {translator_endpoint.stats}")
+        metrics.increment("translation_failed_rows", len(failures))
 
+        df.to_csv(OUTPUT_FILE, encoding='utf-8-sig')
+        run.rows_out = len(translated)
+    metrics.export("translate_jobs")
 
-# Apply function to the column
-df["Job Description"] = df["Job Description"].apply(detect_and_translate)
 
-df.to_csv('src/data_gathering/Dataset_Full.csv', encoding='utf-8-sig')
+if __name__ == "__main__":
+    main()
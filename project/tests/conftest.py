@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The pipeline scripts import each other as top-level modules, like the DAG runs them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "data_gathering"))
@@ -0,0 +1,75 @@
+import pytest
+
+from conc_clean import clean_job_description_for_llm
+from description_trim import collapse_duplicates, is_boilerplate_sentence, trim_description
+
+
+@pytest.mark.parametrize("sentence", [
+    "3+ years of experience analyzing health insurance claims data with SQL and Python.",
+    "Experience with life insurance actuarial models is required.",
+    "You will build pension plan forecasting models in Python.",
+    "Knowledge of equal employment opportunity regulations.",
+    "Familiarity with RRSP and pension plan administration systems.",
+    "Conduct background checks and maintain HR records in Workday.",
+])
+def test_requirements_mentioning_benefit_terms_are_kept(sentence):
+    assert not is_boilerplate_sentence(sentence)
+
+
+@pytest.mark.parametrize("sentence", [
+    "We offer dental insurance, vision care and a pension plan.",
+    "You will be eligible for our group health insurance from day one.",
+    "We are an equal opportunity employer.",
+    "All qualified applicants will receive consideration for employment without regard to race, colour, "
+    "religion, sex, sexual orientation or gender identity.",
+    "Successful candidates will be subject to a background check.",
+    "We thank all applicants for their interest; only candidates selected for an interview will be contacted.",
+])
+def test_benefit_and_eeo_statements_are_boilerplate(sentence):
+    assert is_boilerplate_sentence(sentence)
+
+
+def test_trim_keeps_requirements_with_insurance_wording():
+    text = ("We are hiring a Data Analyst. 3+ years of experience analyzing health insurance claims data with "
+            "SQL and Python. Experience with life insurance actuarial models is required. You will build "
+            "pension plan forecasting models in Python.")
+    trimmed, _, _ = trim_description(text)
+    assert "health insurance claims" in trimmed
+    assert "life insurance actuarial" in trimmed
+    assert "pension plan forecasting" in trimmed
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Hands-on experience with AWS and Docker.", "Hands-on experience with Azure and Docker."),
+    ("Strong knowledge of Python and SQL.", "Strong knowledge of Python and Spark."),
+    ("3+ years of experience with Spark.", "5+ years of experience with Spark."),
+])
+def test_sentences_naming_different_tools_are_both_kept(first, second):
+    assert collapse_duplicates([first, second]) == [first, second]
+
+
+def test_repeated_sentence_is_dropped():
+    sentence = "Hands-on experience with AWS and Docker."
+    assert collapse_duplicates([sentence, sentence, "Strong SQL skills."]) == [sentence, "Strong SQL skills."]
+
+
+def test_french_translation_of_english_sentence_is_dropped():
+    english = "Build reliable data pipelines in Python and orchestrate them with Airflow on AWS."
+    french = "Développer des pipelines de données fiables en Python et les orchestrer avec Airflow sur AWS."
+    assert collapse_duplicates([english, french]) == [english]
+
+
+def test_french_sentence_without_english_counterpart_is_kept():
+    french = "Vous travaillerez avec les équipes produit pour définir les indicateurs dans Tableau."
+    assert collapse_duplicates(["Build dashboards.", french]) == ["Build dashboards.", french]
+
+
+def test_cleaned_description_keeps_sections_for_trimming():
+    scraped = ("Data Engineer\n\n  Responsibilities\n• Build pipelines in   Spark.\n\n\n\nWhat we offer\n"
+               "• Dental insurance and vision care.\n• Paid time off.\n\nRequirements\n• 3+ years of Python.")
+    cleaned = clean_job_description_for_llm(scraped)
+    assert cleaned.split("\n")[:4] == ["Data Engineer", "", "Responsibilities", "Build pipelines in Spark."]
+    trimmed, _, _ = trim_description(cleaned)
+    assert "Build pipelines in Spark." in trimmed
+    assert "3+ years of Python." in trimmed
+    assert "Dental" not in trimmed and "Paid time off" not in trimmed
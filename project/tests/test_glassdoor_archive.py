@@ -0,0 +1,61 @@
+import os
+
+from glassdoor_archive import CaptureWriter, read_archive
+
+CARDS = [("Data Science", "Quebec", f"<li data-id='{i}'>Card {i}</li>", f"<div>Détails {i}</div>") for i in range(3)]
+
+
+def capture(path, close=True):
+    writer = CaptureWriter(str(path), level=3)
+    for card in CARDS:
+        writer.write(*card)
+    if close:
+        writer.close()
+    return writer
+
+
+def fields(records):
+    return [(r["keyword"], r["providence"], r["card_html"], r["detail_html"]) for r in records]
+
+
+def test_round_trip(tmp_path):
+    writer = capture(tmp_path / "run.jsonl.zst")
+    assert writer.records == 3
+    records = list(read_archive(writer.path))
+    assert fields(records) == CARDS
+    assert all(record["captured_at"] for record in records)
+
+
+def test_for_run_is_off_without_a_directory(tmp_path):
+    assert CaptureWriter.for_run(None) is None
+    assert CaptureWriter.for_run("") is None
+
+    writer = CaptureWriter.for_run(str(tmp_path / "captures"))
+    writer.close()
+    assert os.path.dirname(writer.path) == str(tmp_path / "captures")
+    assert os.path.basename(writer.path).startswith("glassdoor_")
+    assert list(read_archive(writer.path)) == []
+
+
+def test_crashed_run_keeps_the_flushed_records(tmp_path):
+    # Never closed: the frame has no end mark, but every record was flushed as a block
+    writer = capture(tmp_path / "run.jsonl.zst", close=False)
+    writer._file.flush()
+    assert fields(read_archive(writer.path)) == CARDS
+    writer._file.close()
+
+
+def test_truncated_tail_is_skipped(tmp_path):
+    path = tmp_path / "run.jsonl.zst"
+    capture(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])  # end mark cut off
+    assert fields(read_archive(str(path))) == CARDS
+
+    first_two = CaptureWriter(str(tmp_path / "two.jsonl.zst"), level=3)
+    for card in CARDS[:2]:
+        first_two.write(*card)
+    first_two._file.close()
+    boundary = os.path.getsize(first_two.path)
+    path.write_bytes(data[:boundary + 5])  # cut inside the third record's block
+    assert fields(read_archive(str(path))) == CARDS[:2]
@@ -0,0 +1,63 @@
+import mongomock
+import pandas as pd
+import pytest
+from pymongo.errors import BulkWriteError
+
+from load_jobs import content_hash, prepare_records, sync_jobs
+from skill_aggregates import SKILL_DEMAND_COLLECTION, aggregates_need_rebuild, mark_aggregates_stale
+from skill_taxonomy import SkillTaxonomy
+
+
+@pytest.fixture
+def taxonomy(tmp_path):
+    skills = [{"id": 0, "name": "Python", "synonyms": []}, {"id": 1, "name": "SQL", "synonyms": []}]
+    return SkillTaxonomy(skills, path=str(tmp_path / "taxonomy.json"), added_path=str(tmp_path / "added.json"))
+
+
+@pytest.fixture
+def db():
+    database = mongomock.MongoClient().jobsTest
+    database.jobs.create_index("job_key", unique=True)
+    return database
+
+
+def make_rows(*urls, skills="Python"):
+    return pd.DataFrame([{"Job Title": "Data Engineer", "Company Name": "Acme", "Location": "Montréal, QC",
+                          "Posted Day": "3d", "Job Description": "Build pipelines.", "job url": url,
+                          "Provincia": "Quebec", "Keyword": "Data", "Experience Level": "Senior",
+                          "Must-have Skills": skills, "Nice-to-have Skills": ""} for url in urls])
+
+
+def python_count(db):
+    doc = db[SKILL_DEMAND_COLLECTION].find_one({"skill": "Python", "skill_type": "must_have"})
+    return doc["count"] if doc else 0
+
+
+def test_content_hash_ignores_bookkeeping_fields():
+    record = {"Job Title": "Data Engineer", "Posted Day": "3d", "Posted Date": "2026-10-16", "Unnamed: 0": 4}
+    later = dict(record, **{"Posted Day": "4d", "Posted Date": "2026-10-15", "Unnamed: 0": 9})
+    assert content_hash(record) == content_hash(later)
+    assert content_hash(record) != content_hash(dict(record, **{"Job Title": "Data Scientist"}))
+
+
+def test_partial_bulk_write_still_counts_applied_writes(db, taxonomy):
+    sync_jobs(db, db.jobs, prepare_records(make_rows("a"), taxonomy), taxonomy)
+    assert python_count(db) == 1
+
+    # A second unique index makes the insert of "c" fail, "b" still goes through
+    db.jobs.create_index("Company Name", unique=True, partialFilterExpression={"job url": {"$in": ["a", "c"]}})
+    with pytest.raises(BulkWriteError):
+        sync_jobs(db, db.jobs, prepare_records(make_rows("a", "b", "c"), taxonomy), taxonomy)
+    assert db.jobs.count_documents({}) == 2
+    assert python_count(db) == 2
+
+
+def test_stale_flag_forces_a_rebuild(db, taxonomy):
+    sync_jobs(db, db.jobs, prepare_records(make_rows("a", "b"), taxonomy), taxonomy)
+    assert not aggregates_need_rebuild(db)
+    db.jobs.delete_one({"job_key": "b"})  # removed behind the loader's back
+    mark_aggregates_stale(db, "test")
+    assert aggregates_need_rebuild(db)
+    sync_jobs(db, db.jobs, prepare_records(make_rows("a"), taxonomy), taxonomy, expire_missing=False)
+    assert python_count(db) == 1
+    assert not aggregates_need_rebuild(db)
@@ -0,0 +1,29 @@
+import os
+import pstats
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+
+
+def busy_worker(n):
+    return sum(i * i for i in range(n))
+
+
+def test_cprofile_includes_worker_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PIPELINE_PROFILE_RUN_ID", "test")
+    with profiling.profiled("threaded", "cprofile") as directory:
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(busy_worker, [20000] * 6))
+    stats = pstats.Stats(os.path.join(directory, "threaded.pstats"))
+    calls = {function: entry[1] for (_, _, function), entry in stats.stats.items()}
+    assert calls.get("busy_worker") == 6
+
+
+def test_memory_mode_writes_allocations_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PIPELINE_PROFILE_RUN_ID", "test")
+    with profiling.profiled("alloc", "memory") as directory:
+        data = [str(i) * 10 for i in range(10000)]
+    assert data
+    assert os.listdir(directory) == ["alloc.allocations.txt"]
@@ -0,0 +1,122 @@
+import json
+import os
+
+import pytest
+
+import similarity_index
+from similarity_index import SimilarityIndex
+
+DESCRIPTIONS = {
+    "a": "Build data pipelines in Python and SQL on Airflow.",
+    "b": "Train machine learning models with PyTorch and deploy them on Kubernetes.",
+    "c": "Maintain React front ends and TypeScript design systems.",
+    "d": "Design dashboards in Power BI for the finance team.",
+}
+
+
+def make_records(keys, version=1):
+    return {key: {"content_hash": f"{key}-{version}", "Job Description": DESCRIPTIONS[key],
+                  "Job Title": f"Role {key} v{version}", "Company Name": "Acme", "Location": "Montreal"}
+            for key in keys}
+
+
+@pytest.fixture
+def directory(tmp_path):
+    path = str(tmp_path / "index")
+    SimilarityIndex.create(path, dimensions=64, capacity=2)
+    return path
+
+
+def write(index, records, expire_missing=False):
+    with index.locked():
+        result = index.upsert(records, expire_missing=expire_missing)
+        index.flush()
+    return result
+
+
+def log_lines(directory):
+    with open(os.path.join(directory, "rows.jsonl"), "rb") as file:
+        return file.read().splitlines()
+
+
+def test_flushed_rows_are_replayed_on_open(directory):
+    added, updated, expired = write(SimilarityIndex(directory), make_records("abc"))
+    assert (sorted(added), updated, expired) == (["a", "b", "c"], [], [])
+
+    index = SimilarityIndex(directory)
+    assert [row[0] for row in index.rows] == ["a", "b", "c"]
+    assert index.rows[index.row_of["b"]] == ["b", "b-1", "Role b v1", "Acme", "Montreal"]
+    assert {result[1] for result in index.similar_to("a", k=5)} == {"b", "c"}
+
+
+def test_changed_rows_are_appended_and_replace_earlier_lines(directory):
+    write(SimilarityIndex(directory), make_records("ab"))
+    added, updated, _ = write(SimilarityIndex(directory), make_records("a", version=2))
+    assert (added, updated) == ([], ["a"])
+    assert len(log_lines(directory)) == 3
+
+    index = SimilarityIndex(directory)
+    assert index.rows == [["a", "a-2", "Role a v2", "Acme", "Montreal"], ["b", "b-1", "Role b v1", "Acme", "Montreal"]]
+
+
+def test_writers_see_each_others_rows_under_the_lock(directory):
+    first, second = SimilarityIndex(directory), SimilarityIndex(directory)
+    write(first, make_records("a"))
+    write(second, make_records("bc"))  # locked() refreshes second before it appends
+    write(first, make_records("d"))
+
+    assert first.row_of == second.row_of | {"d": 3}
+    reader = SimilarityIndex(directory)
+    assert [row[0] for row in reader.rows] == ["a", "b", "c", "d"]
+    assert [json.loads(line)[0] for line in log_lines(directory)] == [0, 1, 2, 3]
+
+
+def test_compaction_rewrites_the_log_and_readers_start_over(directory, monkeypatch):
+    write(SimilarityIndex(directory), make_records("abc"))
+    reader = SimilarityIndex(directory)
+    monkeypatch.setattr(similarity_index, "LOG_COMPACT_FACTOR", 0)
+    write(SimilarityIndex(directory), make_records("b", version=2))
+
+    assert len(log_lines(directory)) == 3
+    reader.refresh()
+    assert reader.meta["log_generation"] == 1
+    assert reader._log_lines == 3
+    assert [row[1] for row in reader.rows] == ["a-1", "b-2", "c-1"]
+
+
+def test_expire_missing_deactivates_absent_postings(directory):
+    index = SimilarityIndex(directory)
+    write(index, make_records("abc"))
+    assert write(index, make_records("ab"), expire_missing=True) == ([], [], ["c"])
+
+    reader = SimilarityIndex(directory)
+    assert not reader.active[reader.row_of["c"]]
+    assert "c" not in {result[1] for result in reader.similar_to("a", k=5)}
+    assert write(index, make_records("abc")) == ([], [], [])
+    assert SimilarityIndex(directory).active[reader.row_of["c"]]
+
+
+def test_partial_and_unflushed_log_lines_are_ignored(directory):
+    write(SimilarityIndex(directory), make_records("ab"))
+    with open(os.path.join(directory, "rows.jsonl"), "ab") as file:
+        file.write(b'[2, "c", "c-1", "Role c", "Acme", "Montreal"]\n')  # meta.json never got count 3
+        file.write(b'[3, "d", "d-')  # still being appended
+
+    index = SimilarityIndex(directory)
+    assert [row[0] for row in index.rows] == ["a", "b"]
+    assert "c" not in index.row_of
+
+
+def test_legacy_rows_json_is_migrated_to_the_log(directory):
+    write(SimilarityIndex(directory), make_records("ab"))
+    rows = SimilarityIndex(directory).rows
+    os.remove(os.path.join(directory, "rows.jsonl"))
+    with open(os.path.join(directory, "rows.json"), "w", encoding="utf-8") as file:
+        json.dump(rows, file)
+
+    index = SimilarityIndex(directory)
+    assert index.rows == rows
+    with index.locked():
+        index.flush()
+    assert not os.path.exists(os.path.join(directory, "rows.json"))
+    assert SimilarityIndex(directory).rows == rows
@@ -0,0 +1,48 @@
+import pytest
+
+from skill_aggregates import compute_deltas
+from skill_taxonomy import SkillTaxonomy
+
+
+@pytest.fixture
+def taxonomy(tmp_path):
+    skills = [{"id": 0, "name": "Python", "synonyms": []}, {"id": 1, "name": "SQL", "synonyms": []},
+              {"id": 2, "name": "Docker", "synonyms": []}]
+    return SkillTaxonomy(skills, path=str(tmp_path / "taxonomy.json"), added_path=str(tmp_path / "added.json"))
+
+
+def make_doc(must_have, level="Senior", posted="2026-10-01"):
+    return {"Provincia": "Quebec", "Keyword": "Data Science", "Experience Level": level,
+            "Posted Date": posted, "Must-have Skills": must_have, "Nice-to-have Skills": ""}
+
+
+def as_counts(skill_deltas):
+    return {(row["skill"], row["skill_type"], row["experience_level"]): row["count"]
+            for row in skill_deltas.to_dict(orient="records")}
+
+
+def test_unchanged_update_cancels_out(taxonomy):
+    old, new = make_doc("Python, SQL"), make_doc("Python, SQL")
+    skill_deltas, date_deltas = compute_deltas([(old, -1), (new, 1)], taxonomy)
+    assert skill_deltas.empty
+    assert date_deltas.empty
+
+
+def test_update_keeps_only_changed_groups(taxonomy):
+    old, new = make_doc("Python, SQL"), make_doc("Python, Docker")
+    skill_deltas, date_deltas = compute_deltas([(old, -1), (new, 1)], taxonomy)
+    assert as_counts(skill_deltas) == {("SQL", "must_have", "Senior"): -1, ("Docker", "must_have", "Senior"): 1}
+    assert date_deltas.empty
+
+
+def test_update_moving_group_reverses_old_counts(taxonomy):
+    old, new = make_doc("Python", level="Junior", posted="2026-10-01"), make_doc("Python", posted="2026-10-02")
+    skill_deltas, date_deltas = compute_deltas([(old, -1), (new, 1)], taxonomy)
+    assert as_counts(skill_deltas) == {("Python", "must_have", "Junior"): -1, ("Python", "must_have", "Senior"): 1}
+    assert dict(zip(date_deltas["posted_date"], date_deltas["count"])) == {"2026-10-01": -1, "2026-10-02": 1}
+
+
+def test_insert_and_expire_of_same_content_cancel_out(taxonomy):
+    skill_deltas, date_deltas = compute_deltas([(make_doc("SQL"), 1), (make_doc("SQL"), -1)], taxonomy)
+    assert skill_deltas.empty
+    assert date_deltas.empty
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from skill_taxonomy import AUTO_ID_START, SkillTaxonomy, normalize_skill
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Python", "python"),
+    ("  SQL.  ", "sql"),
+    ("Python 3.10", "python"),
+    ("python3", "python"),
+    ("Angular v15", "angular"),
+    ("DDR4", "ddr4"),
+    ("Python programming", "python"),
+    ("Java programming language", "java"),
+    ("SQL skills", "sql"),
+    ("Machine Learning (ML)", "machine learning"),
+    ("Québec", "quebec"),
+    ("C++", "c++"),
+    ("C#", "c#"),
+    (".NET", ".net"),
+    ("Node.js", "node.js"),
+    ("CI/CD", "ci/cd"),
+    ("Dashboards", "dashboard"),
+    ("Databases", "database"),
+    ("Technologies", "technology"),
+    ("Business processes", "business process"),
+    ("Indexes", "index"),
+    ("Matches", "match"),
+    ("Caches", "cache"),
+    ("Kubernetes", "kubernetes"),
+    ("Pandas", "pandas"),
+    ("Statistics", "statistics"),
+    ("Time series", "time series"),
+    ("Analysis", "analysis"),
+    ("Not specified", "not specified"),
+    (None, ""),
+])
+def test_normalize_skill(raw, expected):
+    assert normalize_skill(raw) == expected
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def curated(tmp_path):
+    return write_json(tmp_path / "taxonomy.json", {"version": 1, "skills": [
+        {"id": 0, "name": "Python", "synonyms": ["python3"]}, {"id": 1, "name": "SQL", "synonyms": []}]})
+
+
+def test_added_skills_use_their_own_id_range(tmp_path, curated):
+    added = str(tmp_path / "added.json")
+    taxonomy = SkillTaxonomy.load(curated, added)
+    assert taxonomy.resolve("python3") == 0
+    assert taxonomy.resolve("Quantum Computing") == AUTO_ID_START
+    assert taxonomy.resolve("Rust") == AUTO_ID_START + 1
+    taxonomy.save()
+
+    reloaded = SkillTaxonomy.load(curated, added)
+    assert reloaded.resolve("quantum computing", add_missing=False) == AUTO_ID_START
+    assert reloaded.resolve("Go") == AUTO_ID_START + 2
+    with open(curated, encoding="utf-8") as file:
+        assert len(json.load(file)["skills"]) == 2  # the curated file is never written
+
+
+def test_promoted_skill_keeps_its_id(tmp_path):
+    added = write_json(tmp_path / "added.json", {"version": 2, "skills": [
+        {"id": AUTO_ID_START, "name": "pyspark", "synonyms": [], "reviewed": False}]})
+    curated = write_json(tmp_path / "taxonomy.json", {"version": 3, "skills": [
+        {"id": AUTO_ID_START, "name": "Apache Spark", "synonyms": ["pyspark"]}]})
+    taxonomy = SkillTaxonomy.load(curated, added)
+    assert len(taxonomy.skills) == 1
+    assert taxonomy.resolve("PySpark", add_missing=False) == AUTO_ID_START
+
+
+def test_curated_skill_reusing_an_added_id_fails(tmp_path):
+    added = write_json(tmp_path / "added.json", {"version": 2, "skills": [
+        {"id": AUTO_ID_START, "name": "Rust", "synonyms": [], "reviewed": False}]})
+    curated = write_json(tmp_path / "taxonomy.json", {"version": 3, "skills": [
+        {"id": AUTO_ID_START, "name": "Go", "synonyms": []}]})
+    with pytest.raises(ValueError):
+        SkillTaxonomy.load(curated, added)
+
+
+def test_added_skill_below_the_auto_range_fails(tmp_path, curated):
+    added = write_json(tmp_path / "added.json", {"version": 2, "skills": [
+        {"id": 2, "name": "Rust", "synonyms": [], "reviewed": False}]})
+    with pytest.raises(ValueError):
+        SkillTaxonomy.load(curated, added)
@@ -0,0 +1,121 @@
+import queue
+import threading
+
+import pytest
+
+import streaming_pipeline
+from streaming_pipeline import STOP, Loader, Stage
+
+
+@pytest.fixture(autouse=True)
+def no_requeue_pause(monkeypatch):
+    monkeypatch.setattr(streaming_pipeline, "requeue_delay", lambda endpoint=None: 0)
+
+
+def run_stage(stage, items):
+    for item in items:
+        stage.inbox.put(item)
+    stage.inbox.put(STOP)
+    closer = stage.start()
+    closer.join(timeout=10)
+    assert not closer.is_alive()
+    results = []
+    while True:
+        result = stage.outbox.get_nowait()
+        if result is STOP:
+            return results
+        results.append(result)
+
+
+def test_stage_forwards_results_then_stop():
+    stage = Stage("double", lambda value: value * 2, queue.Queue(), queue.Queue(), workers=3)
+    assert sorted(run_stage(stage, [1, 2, 3])) == [2, 4, 6]
+    assert stage.processed == 3
+
+
+def test_stage_requeues_failed_record_before_stopping():
+    failed_once = set()
+
+    def flaky(record):
+        if record["id"] not in failed_once:
+            failed_once.add(record["id"])
+            raise ConnectionError("transient")
+        return record["id"]
+
+    stage = Stage("flaky", flaky, queue.Queue(), queue.Queue(), workers=2)
+    # STOP is queued before the retries come back: the stage still waits for them
+    assert sorted(run_stage(stage, [{"id": 1}, {"id": 2}])) == [1, 2]
+    assert (stage.processed, stage.requeued, stage.failed) == (2, 2, 0)
+
+
+def test_stage_drops_record_after_requeue_passes():
+    def fail(record):
+        raise ValueError("permanent")
+
+    stage = Stage("fail", fail, queue.Queue(), queue.Queue(), workers=1)
+    assert run_stage(stage, [{"id": 1}]) == []
+    assert stage.failed == 1
+    assert stage.requeued == streaming_pipeline.REQUEUE_PASSES - 1
+
+
+def test_failing_tick_does_not_kill_the_worker():
+    ticks = []
+
+    def tick():
+        ticks.append(1)
+        raise ConnectionError("mongo down")
+
+    stage = Stage("load", lambda value: value, queue.Queue(), queue.Queue(), workers=1, tick=tick)
+    closer = stage.start()
+    threading.Event().wait(2.5)  # at least two idle ticks
+    stage.inbox.put("record")
+    stage.inbox.put(STOP)
+    closer.join(timeout=10)
+    assert len(ticks) >= 2
+    assert stage.outbox.get_nowait() == "record"
+    assert stage.processed == 1
+
+
+class FakeLoader(Loader):
+    """Loader whose MongoDB / index write fails for the records marked bad."""
+
+    def __init__(self, bad=()):
+        super().__init__(db=None, collection=None, taxonomy=None, index=None)
+        self.bad = set(bad)
+        self.calls = 0
+
+    def _load(self, batch):
+        self.calls += 1
+        if any(record["id"] in self.bad for record in batch):
+            raise ConnectionError("write failed")
+        self.loaded.extend(batch)
+
+
+def test_failing_record_does_not_block_the_batch():
+    loader = FakeLoader(bad={2})
+    for record_id in (1, 2, 3):
+        loader.batch.append({"id": record_id})
+    loader.flush()
+    assert [record["id"] for record in loader.loaded] == [1, 3]
+    assert loader.batch == []
+    assert [record["id"] for record in loader.retry] == [2]
+
+
+def test_failing_record_is_dropped_after_requeue_passes():
+    loader = FakeLoader(bad={2})
+    loader.batch.append({"id": 2})
+    for _ in range(streaming_pipeline.REQUEUE_PASSES):
+        loader.flush()
+    assert loader.retry == [] and loader.batch == []
+    assert loader.failed == 1
+
+
+def test_drain_retries_until_loaded(monkeypatch):
+    monkeypatch.setattr(streaming_pipeline, "LOAD_FLUSH_SECONDS", 0)
+    loader = FakeLoader(bad={1})
+    loader.batch.append({"id": 1})
+    loader.flush()
+    loader.bad.clear()  # the outage is over
+    loader.drain()
+    assert [record["id"] for record in loader.loaded] == [1]
+    assert loader.failed == 0
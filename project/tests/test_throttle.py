@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+from throttle import CircuitBreaker, CircuitOpenError, Endpoint, RetriesExhaustedError, process_with_requeue
+
+
+def make_endpoint(**overrides):
+    settings = dict(rate=1000, burst=100, initial_concurrency=2, max_concurrency=4, target_latency=1.0,
+                    retries=0, backoff=0, failure_threshold=2, cooldown=60)
+    settings.update(overrides)
+    return Endpoint("test", **settings)
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    assert breaker.record(ok=False) is False
+    assert breaker.record(ok=True) is False  # a success resets the count
+    assert breaker.record(ok=False) is False
+    assert breaker.record(ok=False) is True
+    assert 59 < breaker.reopens_in() <= 60
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("test")
+
+
+def test_breaker_half_open_after_cooldown(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    for _ in range(3):
+        breaker.record(ok=False)
+    now[0] += 30
+    assert breaker.reopens_in() == 30
+    now[0] += 30
+    assert breaker.reopens_in() == 0
+    breaker.before_call("test")  # half-open: the call goes through
+    assert breaker.opened_at is None
+    # One more failure re-opens the circuit straight away
+    assert breaker.record(ok=False) is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("test")
+
+
+def test_closed_breaker_reopens_in_zero():
+    assert CircuitBreaker(failure_threshold=1, cooldown=60).reopens_in() == 0
+
+
+def test_aimd_additive_increase_up_to_max():
+    endpoint = make_endpoint(initial_concurrency=2, max_concurrency=3)
+    for _ in range(2):
+        endpoint.in_flight += 1
+        endpoint._release_slot(latency=0.1, ok=True)
+    assert endpoint.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+    for _ in range(20):
+        endpoint.in_flight += 1
+        endpoint._release_slot(latency=0.1, ok=True)
+    assert endpoint.limit == 3
+
+
+@pytest.mark.parametrize("latency, ok", [(0.1, False), (5.0, True)])
+def test_aimd_multiplicative_decrease_on_error_or_slow_call(latency, ok):
+    endpoint = make_endpoint(initial_concurrency=4)
+    endpoint.in_flight += 1
+    endpoint._release_slot(latency=latency, ok=ok)
+    assert endpoint.limit == 2
+    for _ in range(3):
+        endpoint.in_flight += 1
+        endpoint._release_slot(latency=latency, ok=ok)
+    assert endpoint.limit == 1  # never below one slot
+
+
+def test_call_opens_circuit_after_repeated_errors():
+    endpoint = make_endpoint(retries=1, failure_threshold=2)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(RetriesExhaustedError):
+        endpoint.call(fail)
+    assert endpoint.stats["circuit_opened"] == 1
+    with pytest.raises(CircuitOpenError):
+        endpoint.call(lambda: "never called")
+
+
+def test_requeue_retries_failed_items():
+    attempts = {}
+
+    def flaky(value):
+        attempts[value] = attempts.get(value, 0) + 1
+        if value == "b" and attempts[value] < 2:
+            raise ValueError("transient")
+        return value.upper()
+
+    results, failures = process_with_requeue({1: "a", 2: "b"}, flaky, passes=3, pause=0)
+    assert results == {1: "A", 2: "B"}
+    assert failures == {}
+
+
+def test_requeue_reports_items_failing_every_pass():
+    def fail(value):
+        raise ValueError("permanent")
+
+    results, failures = process_with_requeue({1: "a"}, fail, passes=2, pause=0)
+    assert results == {}
+    assert isinstance(failures[1], ValueError)
+
+
+def test_requeue_waits_for_open_circuit_without_spending_passes():
+    endpoint = make_endpoint(failure_threshold=1, cooldown=0.2)
+    endpoint.breaker.record(ok=False)  # circuit open for 0.2s
+    start = time.monotonic()
+    results, failures = process_with_requeue({1: "a"}, lambda value: endpoint.call(str.upper, value),
+                                             passes=1, pause=0, endpoint=endpoint)
+    assert results == {1: "A"}
+    assert time.monotonic() - start >= 0.2